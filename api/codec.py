@@ -0,0 +1,25 @@
+"""JSON codec of the API clients, orjson when it is installed and the stdlib json module otherwise."""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    if orjson:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+def dumps(obj):
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def parse_response(response):
+    return loads(response.content)
@@ -1,11 +1,13 @@
-import json
 import logging
+
 import config
 
 import requests
 from requests import adapters
 from urllib3.util import retry
 
+from api import codec, hal
+from utils.concurrency import map_distinct
 from utils.token_manager import TokenManager
 
 
@@ -45,10 +47,12 @@ class DataSubmissionPortal:
         self.logger = logging.getLogger(__name__)
         self.url = url if url else config.DSP_API_URL
         self.logger.info(f'Using {self.url}')
+        self.page_size = config.DSP_API_PAGE_SIZE
+        self.page_workers = config.PAGE_FETCH_WORKERS
 
         self.aap_api_domain = config.AAP_API_DOMAIN
         self.token_client = AAPTokenClient(url=config.AAP_API_URL)
-        self.token_manager = TokenManager(token_client=self.token_client)
+        self.token_manager = TokenManager(token_client=self.token_client, background_refresh=True)
         retry_policy = retry.Retry(
             total=100,  # seems that this has a default value of 10,
             # setting this to a very high number so that it'll respect the status retry count
@@ -58,7 +62,11 @@ class DataSubmissionPortal:
             status_forcelist=[500, 502, 503, 504],
             backoff_factor=0.6)
         self.session = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(max_retries=retry_policy)
+        # partitioned submissions of a stage share the session, each running its own worker pools
+        pool_size = max(10, config.DSP_PARALLEL_SUBMISSIONS * max(
+            config.DSP_SUBMISSION_WORKERS, config.DSP_VALIDATION_DETAIL_WORKERS, config.DSP_CURRENT_VERSION_WORKERS,
+            config.PAGE_FETCH_WORKERS))
+        adapter = requests.adapters.HTTPAdapter(max_retries=retry_policy, pool_maxsize=pool_size)
         self.session.mount('https://', adapter)
 
     def get_headers(self):
@@ -81,6 +89,19 @@ class DataSubmissionPortal:
     def get_contents(self, get_contents_url):
         return self._get(get_contents_url)
 
+    def get_submitted_entities(self, contents):
+        """Returns the entities already in a submission by alias, paging each of its content lists once."""
+        entities = {}
+        entity_links = set(DSP_ENTITY_LINK.values()) | set(DSP_ENTITY_CURR_VERSION_LINK.values())
+        for entity_link in sorted(entity_links):
+            link = contents['_links'].get(entity_link)
+            if not link:
+                continue
+            for entity in self._get_all(link['href'], None):
+                if entity.get('alias'):
+                    entities[entity['alias']] = entity
+        return entities
+
     def get_entity_url(self, entity_type):
         return DSP_ENTITY_LINK[entity_type]
 
@@ -101,9 +122,17 @@ class DataSubmissionPortal:
     def get_validation_results(self, get_validation_results_url):
         return self._get_all(get_validation_results_url, 'validationResults')
 
+    def get_validation_result(self, validation_result_url):
+        return self._get(validation_result_url)
+
     def get_validation_result_details(self, get_validation_result_url):
         return self._get(get_validation_result_url)
 
+    @staticmethod
+    def get_link_url(resource, rel):
+        # TODO fix how what to put as projection param, check dsp documentation, removing any params for now
+        return resource['_links'][rel]['href'].split('{')[0]
+
     def update_submission_status(self, dsp_submission, new_status):
         submission_status_url = dsp_submission['_links']['submissionStatus']['href']
         status_json = {"status": new_status}
@@ -112,6 +141,10 @@ class DataSubmissionPortal:
 
         return updated_submission
 
+    def get_submission_blockers_summary(self, dsp_submission):
+        get_summary_url = dsp_submission['_links']['submissionBlockersSummary']['href']
+        return self._get(get_summary_url)
+
     def get_processing_summary(self, dsp_submission):
         get_summary_url = dsp_submission['_links']['processingStatusSummary']['href']
 
@@ -129,10 +162,17 @@ class DataSubmissionPortal:
         if response.status_code == requests.codes.not_found:
             return None
         elif response.status_code == requests.codes.ok:
-            return response.json()
+            return codec.parse_response(response)
         else:
             response.raise_for_status()
 
+    def get_current_versions(self, entity_keys, workers=1):
+        """Returns the current version by (entity type, alias), keys whose lookup failed are left out."""
+        current_versions, _ = map_distinct(lambda entity_key: self.get_current_version(*entity_key), entity_keys,
+                                           workers=workers, errors=(requests.RequestException,),
+                                           failure_message='Could not get the current version of', logger=self.logger)
+        return current_versions
+
     # ===
 
     def _get(self, url):
@@ -140,11 +180,11 @@ class DataSubmissionPortal:
         return self._get_json(response)
 
     def _post(self, url, data_json):
-        response = self.session.post(url, data=json.dumps(data_json), headers=self.get_headers())
+        response = self.session.post(url, data=codec.dumps(data_json), headers=self.get_headers())
         return self._get_json(response)
 
     def _patch(self, url, data_json):
-        response = self.session.patch(url, data=json.dumps(data_json), headers=self.get_headers())
+        response = self.session.patch(url, data=codec.dumps(data_json), headers=self.get_headers())
         return self._get_json(response)
 
     def _delete(self, delete_url):
@@ -159,7 +199,7 @@ class DataSubmissionPortal:
 
     def _get_json(self, response):
         response.raise_for_status()
-        return response.json()
+        return codec.parse_response(response)
 
     def _get_embedded_list(self, response, list_name):
         if response and "_embedded" in response:
@@ -167,12 +207,4 @@ class DataSubmissionPortal:
         return []
 
     def _get_all(self, url, entity_type):
-        r = self.session.get(url, headers=self.get_headers())
-        r.raise_for_status()
-        if "_embedded" in r.json():
-            for entity in r.json()["_embedded"][entity_type]:
-                yield entity
-            while "next" in r.json()["_links"]:
-                r = self.session.get(r.json()["_links"]["next"]["href"], headers=self.get_headers())
-                for entity in r.json()["_embedded"][entity_type]:
-                    yield entity
+        return hal.get_all(self._get, url, entity_type, page_size=self.page_size, workers=self.page_workers)
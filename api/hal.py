@@ -0,0 +1,42 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utils.concurrency import map_bounded
+
+
+def set_query_params(url, **params):
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    query_params = dict(parse_qsl(query))
+    query_params.update({key: str(value) for key, value in params.items() if value is not None})
+    return urlunsplit((scheme, netloc, path, urlencode(query_params), fragment))
+
+
+def get_all(get_page, url, entity_type, page_size=None, workers=1):
+    """Yields every entity of a paged HAL collection in order, fetching pages concurrently if workers > 1."""
+    if page_size:
+        url = set_query_params(url, size=page_size)
+
+    page = get_page(url)
+    if "_embedded" not in page:
+        return
+
+    yield from _get_embedded(page, entity_type)
+
+    page_info = page.get("page", {})
+    total_pages = page_info.get("totalPages")
+    if workers > 1 and total_pages and "next" in page["_links"]:
+        page_urls = [set_query_params(url, page=number, size=page_info.get("size"))
+                     for number in range(page_info.get("number", 0) + 1, total_pages)]
+        for _, page in map_bounded(get_page, page_urls, workers):
+            yield from _get_embedded(page, entity_type)
+        return
+
+    while "next" in page["_links"]:
+        page = get_page(page["_links"]["next"]["href"])
+        yield from _get_embedded(page, entity_type)
+
+
+def _get_embedded(page, entity_type):
+    embedded = page.get("_embedded", {})
+    if entity_type is None:
+        return [entity for entities in embedded.values() for entity in entities]
+    return embedded.get(entity_type, [])
@@ -1,14 +1,48 @@
 import logging
+import re
+import threading
 
 import requests
 from requests import adapters
 from urllib3.util import retry
 
 import config
+from api import codec, hal
+from utils.cache import LRUCache, MISSING
+from utils.concurrency import get_worker_count
+
+
+# reads the schema name from HCA describedBy urls, only fetches the schema of urls that do not follow the pattern
+class SchemaRegistry:
+    TYPE_SCHEMA_URL_PATTERN = re.compile(r'/type/(?:[a-z_]+/)+\d+\.\d+\.\d+/([a-z_]+)/?$')
+
+    def __init__(self, get_schema):
+        self.get_schema = get_schema
+        self.schema_names = {}
+        self._lock = threading.Lock()
+
+    def get_schema_name(self, schema_url):
+        schema_name = self.schema_names.get(schema_url)
+        if schema_name:
+            return schema_name
+
+        with self._lock:
+            if schema_url not in self.schema_names:
+                self.schema_names[schema_url] = self._resolve_schema_name(schema_url)
+            return self.schema_names[schema_url]
+
+    def _resolve_schema_name(self, schema_url):
+        match = self.TYPE_SCHEMA_URL_PATTERN.search(schema_url)
+        if match:
+            return match.group(1)
+        schema = self.get_schema(schema_url)
+        return schema.get('name')
 
 
 class IngestAPI:
-    def __init__(self, url=None):
+    RELATION_LOCK_STRIPES = 64
+
+    def __init__(self, url=None, entity_cache=None, persistent_cache=None, workers=1):
         self.logger = logging.getLogger(__name__)
         self.headers = {
             'Content-type': 'application/json',
@@ -16,8 +50,21 @@ class IngestAPI:
         self.url = url if url else config.INGEST_API_URL
         self.url = self.url.rstrip('/')
         self.logger.info(f'Using {self.url}')
-        self.entity_cache = {}
+        self.page_size = config.INGEST_API_PAGE_SIZE
+        self.page_workers = config.PAGE_FETCH_WORKERS
+        self.entity_cache = entity_cache if entity_cache is not None else LRUCache(
+            max_entries=config.INGEST_CACHE_MAX_ENTRIES,
+            max_bytes=config.INGEST_CACHE_MAX_BYTES,
+            ttl=config.INGEST_CACHE_TTL)
+        self.relation_cache = LRUCache(
+            max_entries=config.INGEST_CACHE_MAX_ENTRIES,
+            max_bytes=config.INGEST_CACHE_MAX_BYTES,
+            ttl=config.INGEST_CACHE_TTL)
+        self.persistent_cache = persistent_cache
         self.cache_enabled = True
+        # concurrent lookups of the same relation wait for the first one instead of paging it again
+        self._relation_locks = [threading.Lock() for _ in range(self.RELATION_LOCK_STRIPES)]
+        self.schema_registry = SchemaRegistry(self.get_schema)
 
         retry_policy = retry.Retry(
             total=100,  # seems that this has a default value of 10,
@@ -29,13 +76,20 @@ class IngestAPI:
             backoff_factor=0.6)
 
         self.session = requests.Session()
-        adapter = requests.adapters.HTTPAdapter(max_retries=retry_policy)
+        # every manifest worker pages on up to page_workers threads
+        pool_size = max(10, get_worker_count(workers) * self.page_workers)
+        adapter = requests.adapters.HTTPAdapter(max_retries=retry_policy, pool_maxsize=pool_size)
         self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def get_related_entity(self, entity, relation, related_entity_type):
         related_entity_uri = self._get_link(entity, relation)
-        related_entities = list(self._get_all(related_entity_uri, related_entity_type))
-        return related_entities
+        with self._relation_locks[hash(related_entity_uri) % self.RELATION_LOCK_STRIPES]:
+            related_entities = self._get_cached_relation(related_entity_uri)
+            if related_entities is MISSING:
+                related_entities = list(self._get_all(related_entity_uri, related_entity_type))
+                self._cache_relation(related_entity_uri, related_entities, related_entity_type)
+        return list(related_entities)
 
     def get_submission_by_id(self, submission_id):
         get_submission_url = self.url + '/submissionEnvelopes/' + submission_id
@@ -45,17 +99,18 @@ class IngestAPI:
         submission = None
 
         if response.ok:
-            submission = response.json()
+            submission = codec.parse_response(response)
 
         return submission
 
     def get_concrete_entity_type(self, entity):
         content = entity.get('content')
         schema_url = content.get('describedBy')
-        response = self.session.get(schema_url, headers=self.headers)
-        schema = self._handle_response(response)
+        return self.schema_registry.get_schema_name(schema_url)
 
-        return schema.get('name')
+    def get_schema(self, schema_url):
+        response = self.session.get(schema_url, headers=self.headers)
+        return self._handle_response(response)
 
     def get_entity_by_uuid(self, entity_type, uuid):
         entity_url = f'{self.url}/{entity_type}/search/findByUuid?uuid={uuid}'
@@ -67,19 +122,73 @@ class IngestAPI:
 
     def get_entity(self, entity_url):
         entity_json = self._get_cached_entity(entity_url)
-        if not entity_json:
+        if entity_json is MISSING:
             response = self.session.get(entity_url, headers=self.headers)
             entity_json = self._handle_response(response)
-            self._cache_entity(entity_url, entity_json)
+            self._cache_entity(entity_url, entity_json, size=len(response.content))
         return entity_json
 
+    def get_cache_stats(self):
+        stats = self.entity_cache.get_stats()
+        stats['relations'] = self.relation_cache.get_stats()
+        if self.persistent_cache:
+            stats['persistent'] = self.persistent_cache.get_stats()
+        return stats
+
     def _get_cached_entity(self, url):
-        if self.cache_enabled and self.entity_cache.get(url):
-            return self.entity_cache.get(url)
+        if not self.cache_enabled:
+            return MISSING
+
+        entity_json = self.entity_cache.get(url)
+        if entity_json is MISSING and self.persistent_cache:
+            entity_json = self.persistent_cache.get(url)
+            if entity_json is not MISSING:
+                self.entity_cache.set(url, entity_json, size=self._get_size(entity_json))
+        return entity_json
 
-    def _cache_entity(self, url, entity_json):
-        if self.cache_enabled and not self.entity_cache.get(url):
-            self.entity_cache[url] = entity_json
+    def _cache_entity(self, url, entity_json, size=0):
+        if self.cache_enabled:
+            self.entity_cache.set(url, entity_json, size=size)
+            if self.persistent_cache:
+                self.persistent_cache.set(url, entity_json)
+
+    def _get_cached_relation(self, url):
+        if not self.cache_enabled:
+            return MISSING
+
+        related_entities = self.relation_cache.get(url)
+        if related_entities is MISSING and self.persistent_cache:
+            related_entities = self.persistent_cache.get(url)
+            if related_entities is not MISSING:
+                size = sum(self._get_size(related_entity) for related_entity in related_entities)
+                self.relation_cache.set(url, related_entities, size=size)
+        return related_entities
+
+    def _cache_relation(self, url, related_entities, related_entity_type):
+        if not self.cache_enabled:
+            return
+
+        sizes = [self._get_size(related_entity) for related_entity in related_entities]
+        self.relation_cache.set(url, related_entities, size=sum(sizes))
+        persistent_items = [(url, related_entities)]
+
+        # the related entities are complete resources, so later lookups of them by url or uuid are served from cache
+        for related_entity, size in zip(related_entities, sizes):
+            entity_urls = [self._get_link(related_entity, 'self')]
+            uuid = related_entity.get('uuid', {}).get('uuid')
+            if uuid:
+                entity_urls.append(f'{self.url}/{related_entity_type}/search/findByUuid?uuid={uuid}')
+            for entity_url in entity_urls:
+                self.entity_cache.set(entity_url, related_entity, size=size)
+                persistent_items.append((entity_url, related_entity))
+
+        # one transaction for the relation and all its entities
+        if self.persistent_cache:
+            self.persistent_cache.set_many(persistent_items)
+
+    @staticmethod
+    def _get_size(entity_json):
+        return len(codec.dumps(entity_json))
 
     def get_submission_by_uuid(self, submission_uuid):
         return self.get_entity_by_uuid('submissionEnvelopes', submission_uuid)
@@ -104,6 +213,7 @@ class IngestAPI:
         manifests = self.get_manifests_from_project(project_uuid, "PRIMARY")
         manifest_ids = []
         for manifest in manifests:
+            self._cache_entity(self._get_link(manifest, 'self'), manifest)
             manifest_ids.append(self.get_entity_id(manifest, 'bundleManifests'))
         return manifest_ids
 
@@ -116,7 +226,7 @@ class IngestAPI:
     @staticmethod
     def _handle_response(response):
         response.raise_for_status()
-        return response.json()
+        return codec.parse_response(response)
 
     @staticmethod
     def _get_link(entity, link_name):
@@ -124,12 +234,9 @@ class IngestAPI:
         return link['href'].rsplit("{")[0] if link else ''
 
     def _get_all(self, url, entity_type):
+        return hal.get_all(self._get_page, url, entity_type, page_size=self.page_size, workers=self.page_workers)
+
+    def _get_page(self, url):
         r = self.session.get(url, headers=self.headers)
         r.raise_for_status()
-        if "_embedded" in r.json():
-            for entity in r.json()["_embedded"][entity_type]:
-                yield entity
-            while "next" in r.json()["_links"]:
-                r = self.session.get(r.json()["_links"]["next"]["href"], headers=self.headers)
-                for entity in r.json()["_embedded"][entity_type]:
-                    yield entity
+        return codec.parse_response(r)
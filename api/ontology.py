@@ -2,15 +2,42 @@ import logging
 
 import config
 import requests
+from requests import adapters
+from urllib3.util import retry
+
+from api import codec
+from api.ontology_index import OntologyIndex
+from utils.cache import LRUCache, MISSING, SQLiteCache
+from utils.concurrency import map_distinct
 
 from urllib.parse import quote
 
 
 class OntologyAPI:
-    def __init__(self, url=None):
+    def __init__(self, url=None, cache=None, persistent_cache=None, index=None, offline=False):
         self.url = url if url else config.ONTOLOGY_API_URL
         self.logger = logging.getLogger(__name__)
         self.logger.info(f'Using {self.url}')
+        # search results are cached including the ones that found no iri, so unresolvable terms are only searched once
+        self.cache = cache if cache is not None else LRUCache(max_entries=config.ONTOLOGY_CACHE_MAX_ENTRIES)
+        self.persistent_cache = persistent_cache
+        # exact searches are answered by the local index when there is one, misses only go to OLS if not offline
+        self.index = index
+        self.offline = offline
+
+        # expand_curies looks terms up concurrently, so the pool holds a connection per worker
+        retry_policy = retry.Retry(
+            total=config.ONTOLOGY_API_RETRIES,
+            read=config.ONTOLOGY_API_RETRIES,
+            status_forcelist=[500, 502, 503, 504],
+            backoff_factor=0.6)
+        self.timeout = config.ONTOLOGY_API_TIMEOUT
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(max_retries=retry_policy,
+                                                pool_connections=config.ONTOLOGY_API_POOL_SIZE,
+                                                pool_maxsize=config.ONTOLOGY_API_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def expand_curie(self, term):
         iri = self.search(term)
@@ -23,10 +50,34 @@ class OntologyAPI:
 
         raise Error(f'Could not retrieve IRI for {term}')
 
+    def expand_curies(self, terms, workers=1):
+        """Returns the iri by term, None for the terms that could not be expanded."""
+        iris, failures = map_distinct(self.expand_curie, terms, workers=workers,
+                                      errors=(Error, requests.RequestException), failure_message='Could not expand',
+                                      logger=self.logger)
+        iris.update(dict.fromkeys(failures))
+        return iris
+
     def search(self, term, exact=True, obsolete=False, group=True, query_fields=None):
         if not term:
             raise Error(f'Search term must be supplied.')
 
+        cache_key = '\t'.join([term, str(exact), str(obsolete), str(group), str(query_fields)])
+        iri = self._get_cached_iri(cache_key)
+        if iri is MISSING:
+            iri = self._search(term, exact, obsolete, group, query_fields)
+            self._cache_iri(cache_key, iri)
+        return iri
+
+    def _search(self, term, exact, obsolete, group, query_fields):
+        if self.index and exact:
+            iri = self.index.search(term, obsolete=obsolete)
+            if iri:
+                return iri
+
+        if self.offline:
+            return None
+
         exact = 'true' if exact else 'false'
         obsolete = 'true' if obsolete else 'false'
         group = 'true' if group else 'false'
@@ -36,9 +87,9 @@ class OntologyAPI:
             params += f'&queryFields={query_fields}'
         query_url = f'{self.url}/api/search?{params}'
 
-        r = requests.get(query_url)
+        r = self.session.get(query_url, timeout=self.timeout)
         r.raise_for_status()
-        body = r.json()
+        body = codec.parse_response(r)
         response = body.get('response')
 
         iri = None
@@ -47,9 +98,25 @@ class OntologyAPI:
             iri = docs[0].get('iri') if docs else None
         return iri
 
+    def _get_cached_iri(self, cache_key):
+        iri = self.cache.get(cache_key)
+        if iri is MISSING and self.persistent_cache:
+            iri = self.persistent_cache.get(cache_key)
+            if iri is not MISSING:
+                self.cache.set(cache_key, iri)
+        return iri
+
+    def _cache_iri(self, cache_key, iri):
+        self.cache.set(cache_key, iri)
+        if self.persistent_cache:
+            self.persistent_cache.set(cache_key, iri)
+
 
 class Error(Exception):
     """Base-class for all exceptions raised by this module."""
 
 
-__api__ = OntologyAPI()
+__api__ = OntologyAPI(persistent_cache=SQLiteCache(config.ONTOLOGY_CACHE_PATH, max_age=config.ONTOLOGY_CACHE_MAX_AGE)
+                      if config.ONTOLOGY_CACHE_PATH else None,
+                      index=OntologyIndex(config.ONTOLOGY_INDEX_PATH) if config.ONTOLOGY_INDEX_PATH else None,
+                      offline=config.ONTOLOGY_OFFLINE)
@@ -0,0 +1,121 @@
+"""Offline ontology index for OntologyAPI, built with: python -m api.ontology_index efo.obo efo.idx"""
+import json
+import mmap
+import os
+import re
+import sys
+
+OBO_IRI_PREFIX = 'http://purl.obolibrary.org/obo/'
+IRI_PREFIXES = {
+    'EFO': 'http://www.ebi.ac.uk/efo/'
+}
+
+
+def normalise_key(term):
+    return re.sub(r'\s+', ' ', str(term)).strip().lower()
+
+
+def curie_to_iri(curie):
+    prefix, local_id = curie.split(':', 1)
+    return f'{IRI_PREFIXES.get(prefix, OBO_IRI_PREFIX)}{prefix}_{local_id}'
+
+
+def read_obo_terms(path):
+    """Yields (curie, label, iri, is_obsolete) for every [Term] stanza of an OBO file."""
+    term = None
+    with open(path, encoding='utf-8') as obo_file:
+        for line in obo_file:
+            line = line.strip()
+            if line.startswith('['):
+                if term and term.get('id'):
+                    yield _obo_term(term)
+                term = {} if line == '[Term]' else None
+            elif term is not None and ': ' in line:
+                tag, value = line.split(': ', 1)
+                term.setdefault(tag, value.split(' !', 1)[0].strip())
+    if term and term.get('id'):
+        yield _obo_term(term)
+
+
+def _obo_term(term):
+    curie = term['id']
+    iri = curie_to_iri(curie) if ':' in curie else curie
+    return curie, term.get('name'), iri, term.get('is_obsolete') == 'true'
+
+
+def read_ols_terms(path):
+    """Yields (curie, label, iri, is_obsolete) for the terms of an OLS terms or search JSON export."""
+    with open(path, encoding='utf-8') as json_file:
+        content = json.load(json_file)
+
+    if isinstance(content, dict):
+        content = content.get('_embedded', {}).get('terms') or content.get('response', {}).get('docs', [])
+
+    for term in content:
+        yield term.get('obo_id'), term.get('label'), term.get('iri'), bool(term.get('is_obsolete'))
+
+
+def build_index(source_path, index_path):
+    read_terms = read_obo_terms if source_path.endswith('.obo') else read_ols_terms
+
+    entries = set()
+    for curie, label, iri, is_obsolete in read_terms(source_path):
+        if not iri:
+            continue
+        for key in [curie, label]:
+            if key:
+                entries.add((normalise_key(key).encode('utf-8'), b'1' if is_obsolete else b'0', iri.encode('utf-8')))
+
+    with open(index_path, 'wb') as index_file:
+        for key, obsolete, iri in sorted(entries):
+            index_file.write(b'\t'.join([key, obsolete, iri]) + b'\n')
+
+    return len(entries)
+
+
+class OntologyIndex:
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self._file = open(index_path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(index_path) else b''
+
+    def search(self, term, obsolete=False):
+        """Returns the iri of the term by CURIE or label, obsolete terms only if no current term matches."""
+        for is_obsolete, iri in self._find(normalise_key(term).encode('utf-8')):
+            if obsolete or not is_obsolete:
+                return iri
+        return None
+
+    def close(self):
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+    def _find(self, key):
+        index = self._map
+        low, high = 0, len(index)
+        # binary search for the first line whose key is not less than the search key, low is always a line start
+        while low < high:
+            middle = (low + high) // 2
+            start = index.rfind(b'\n', 0, middle) + 1
+            end = index.find(b'\n', start)
+            if index[start:index.find(b'\t', start)] < key:
+                low = end + 1
+            else:
+                high = start
+
+        while low < len(index):
+            end = index.find(b'\n', low)
+            line_key, is_obsolete, iri = index[low:end].split(b'\t')
+            if line_key != key:
+                break
+            yield is_obsolete == b'1', iri.decode('utf-8')
+            low = end + 1
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Usage: python -m api.ontology_index <obo or OLS json file> <index file>')
+        exit(2)
+    count = build_index(sys.argv[1], sys.argv[2])
+    print(f'Saved {count} keys to {sys.argv[2]}')
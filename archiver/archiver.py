@@ -1,16 +1,30 @@
 import json
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-import polling as polling
+import requests
 
 import config
 
 from api import ontology
+from api.dsp import DataSubmissionPortal
 from api.ingest import IngestAPI
+from archiver.checkpoint import AddEntitiesCheckpoint
+from archiver.metadata_index import MetadataIndex
 from archiver.converter import ConversionError, SampleConverter, ProjectConverter, \
     SequencingExperimentConverter, SequencingRunConverter, StudyConverter
 from utils import protocols
+from utils.concurrency import get_worker_count, map_bounded
 from utils.graph import Graph
+from utils.poll_scheduler import PollScheduler, PollTimeoutException
+
+
+# DSP entities reference entities of earlier types by alias, so they are created in this order
+ENTITY_CREATION_ORDER = ["project", "study", "sample", "sequencingExperiment", "sequencingRun"]
+
+# processing statuses of submitted entities that DSP is done with
+PROCESSING_FINAL_STATUSES = ["Completed", "Error"]
 
 
 def _print_same_line(string):
@@ -34,6 +48,7 @@ class ArchiveEntity:
         self.dsp_current_version = None
         self.links = {}
         self.manifest_id = None
+        self.manifest_ids = []
 
     def __str__(self):
         return str(vars(self))
@@ -47,6 +62,7 @@ class ArchiveEntity:
         entity.accession = report_entity['accession']
         entity.errors = report_entity['errors']
         entity.warnings = report_entity['warnings']
+        entity.manifest_ids = report_entity.get('manifest_ids', [])
         return entity
 
 
@@ -95,6 +111,7 @@ class ArchiveEntityMap:
             entities[entity.id]['accession'] = entity.accession
             entities[entity.id]['warnings'] = entity.warnings
             entities[entity.id]['converted_data'] = entity.conversion
+            entities[entity.id]['manifest_ids'] = entity.manifest_ids
 
             if entity.dsp_json:
                 entities[entity.id]['entity_url'] = entity.dsp_json['_links']['self']['href']
@@ -279,8 +296,92 @@ class Manifest:
         return input_biomaterials[0]
 
 
+# the validation results of a submission at one poll, refreshing only the pending ones when that is cheaper
+class ValidationSnapshot:
+    def __init__(self, dsp_api, submission, workers=None, previous=None):
+        self.dsp_api = dsp_api
+        self.workers = workers if workers else config.DSP_VALIDATION_DETAIL_WORKERS
+        self.incremental = bool(previous and previous.can_refresh_pending())
+        if self.incremental:
+            self.validation_results = self._refresh_pending(previous.validation_results)
+        else:
+            get_validation_results_url = submission['_links']['validationResults']['href']
+            self.validation_results = list(self.dsp_api.get_validation_results(get_validation_results_url))
+        self._details = None
+
+    def can_refresh_pending(self):
+        pending_results = self.get_pending_results()
+        if not self.validation_results or not pending_results:
+            return False
+        if not all(result.get('_links', {}).get('self') for result in pending_results):
+            return False
+        page_count = -(-len(self.validation_results) // self.dsp_api.page_size)
+        return len(pending_results) <= page_count * self.workers
+
+    def get_pending_results(self):
+        return [result for result in self.validation_results if result['validationStatus'] != "Complete"]
+
+    def is_validated(self):
+        for validation_result in self.validation_results:
+            if validation_result['validationStatus'] != "Complete":
+                return False
+        return True
+
+    def get_pending_count(self):
+        return len(self.get_pending_results())
+
+    def get_details(self):
+        if self._details is None:
+            details = list(self.iter_details())
+            details.sort(key=lambda detail: detail[1])
+            self._details = [validation_result_details for validation_result_details, _ in details]
+        return self._details
+
+    def iter_details(self):
+        """Yields (details, result index) of the completed results in the order the details arrive."""
+        if self._details is not None:
+            yield from ((details, index) for index, details in enumerate(self._details))
+            return
+
+        details_urls = []
+        for validation_result in self.validation_results:
+            if validation_result['validationStatus'] == "Complete":
+                details_urls.append(DataSubmissionPortal.get_link_url(validation_result, 'validationResult'))
+
+        for index, details in map_bounded(self.dsp_api.get_validation_result_details, details_urls, self.workers,
+                                          ordered=False):
+            yield details, index
+
+    def get_errors(self):
+        errors = []
+        for validation_result_details in self.get_details():
+            if validation_result_details.get('errorMessages'):
+                errors.append(validation_result_details.get('errorMessages'))
+        return errors
+
+    def _refresh_pending(self, validation_results):
+        validation_results = list(validation_results)
+        pending_indices = [index for index, result in enumerate(validation_results)
+                           if result['validationStatus'] != "Complete"]
+        result_urls = [DataSubmissionPortal.get_link_url(validation_results[index], 'self') for index in pending_indices]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for index, result in zip(pending_indices, executor.map(self.dsp_api.get_validation_result, result_urls)):
+                validation_results[index] = result
+        return validation_results
+
+    def get_error_report(self):
+        report = {}
+        for validation_result_details, _ in self.iter_details():
+            submittable_href = validation_result_details['_links']['submittable']['href']
+            if submittable_href and validation_result_details.get('errorMessages'):
+                if not report.get(submittable_href):
+                    report[submittable_href] = []
+                report[submittable_href].append(validation_result_details.get('errorMessages'))
+        return report
+
+
 class ArchiveSubmission:
-    def __init__(self, dsp_api, dsp_submission_url=None):
+    def __init__(self, dsp_api, dsp_submission_url=None, ledger=None):
         self.submission = {}
         self.errors = list()
         self.processing_result = list()
@@ -293,6 +394,11 @@ class ArchiveSubmission:
         self.accession_map = None
         self.invalid = False
         self.status = None
+        self.validation_snapshot = None
+        self.validation_summary = None
+        self.pending_processing_count = None
+        self.polling_stats = {}
+        self.ledger = ledger
 
         if dsp_submission_url:
             self.submission = self.dsp_api.get_submission(dsp_submission_url)
@@ -307,17 +413,143 @@ class ArchiveSubmission:
     def __str__(self):
         return str(vars(self))
 
-    def add_entities(self, converted_entities):
+    def add_entities(self, converted_entities, workers=None, checkpoint=None, resume=False):
+        """Adds the entities, skipping the ones in the submission or the checkpoint when resuming."""
+        workers = workers if workers else config.DSP_SUBMISSION_WORKERS
+        # the results of new entities would be missed by an incremental refresh of an earlier snapshot
+        self.validation_snapshot = None
         get_contents_url = self.submission['_links']['contents']['href']
         contents = self.dsp_api.get_contents(get_contents_url)
 
-        entity: ArchiveEntity
-        for entity in converted_entities:
-            entity_link = self.dsp_api.get_entity_url(entity.archive_entity_type)
-            create_entity_url = contents['_links'][f'{entity_link}:create']['href']
+        existing_entities = {}
+        if resume:
+            existing_entities.update(checkpoint.load() if checkpoint else {})
+            existing_entities.update(self.dsp_api.get_submitted_entities(contents))
+
+        # entities of a level only reference entities of earlier levels, so each level is created concurrently
+        skipped_count = 0
+        failed_aliases = set()
+        for level in self.get_creation_levels(converted_entities):
+            missing_entities = []
+            for entity in level:
+                if entity.id in existing_entities:
+                    entity.dsp_json = existing_entities[entity.id]
+                    skipped_count += 1
+                    continue
+                failed_references = self._get_referenced_aliases(entity) & failed_aliases
+                if failed_references:
+                    self._add_reference_error(entity, failed_references)
+                    failed_aliases.add(entity.id)
+                else:
+                    missing_entities.append(entity)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                added = list(executor.map(lambda entity: self._add_entity(contents, entity, checkpoint),
+                                          missing_entities))
+            failed_aliases.update(entity.id for entity, is_added in zip(missing_entities, added) if not is_added)
+
+        if resume:
+            print(f"Resumed DSP submission, {skipped_count} of {len(converted_entities)} entities were already added.")
+
+    def _add_entity(self, contents, entity: ArchiveEntity, checkpoint=None):
+        entity_link = self.dsp_api.get_entity_url(entity.archive_entity_type)
+        create_entity_url = contents['_links'][f'{entity_link}:create']['href']
 
+        try:
             created_entity = self.dsp_api.create_entity(create_entity_url, entity.conversion)
             entity.dsp_json = created_entity
+            if checkpoint:
+                checkpoint.record(entity.id, created_entity['_links']['self']['href'])
+            return True
+        except requests.RequestException as e:
+            response_text = e.response.text if e.response is not None else ''
+            error = {
+                "error_message": f"An error occured adding a {entity.archive_entity_type} with alias {entity.id} to "
+                                 f"the DSP submission: {str(e)}.",
+                "details": {"response": response_text}
+            }
+            entity.errors.append(error)
+            self.errors.append(error)
+            return False
+
+    def _add_reference_error(self, entity: ArchiveEntity, failed_references):
+        error = {
+            "error_message": f"The {entity.archive_entity_type} with alias {entity.id} was not added to the DSP "
+                             f"submission, a referenced entity was not created.",
+            "details": {"references": sorted(failed_references)}
+        }
+        entity.errors.append(error)
+        self.errors.append(error)
+
+    @staticmethod
+    def _get_referenced_aliases(entity: ArchiveEntity):
+        conversion = entity.conversion
+        references = [conversion.get('projectRef'), conversion.get('studyRef')]
+        references.extend(conversion.get('sampleRelationships', []))
+        references.extend(sample_use.get('sampleRef') for sample_use in conversion.get('sampleUses', []))
+        references.extend(conversion.get('sampleRefs', []))
+        assay_refs = conversion.get('assayRefs', [])
+        references.extend(assay_refs if isinstance(assay_refs, list) else [assay_refs])
+        return {reference['alias'] for reference in references if isinstance(reference, dict) and reference.get('alias')}
+
+    @staticmethod
+    def get_creation_levels(converted_entities):
+        entities_by_type = {}
+        for entity in converted_entities:
+            entities_by_type.setdefault(entity.archive_entity_type, []).append(entity)
+
+        levels = []
+        entity_types = ENTITY_CREATION_ORDER + [entity_type for entity_type in entities_by_type.keys()
+                                                if entity_type not in ENTITY_CREATION_ORDER]
+        for entity_type in entity_types:
+            entities = entities_by_type.get(entity_type, [])
+            if entity_type == 'sample':
+                levels.extend(ArchiveSubmission._get_sample_levels(entities))
+            elif entities:
+                levels.append(entities)
+        return levels
+
+    @staticmethod
+    def partition(converted_entities, max_size):
+        """Returns stages of submissions of at most max_size entities, referencing only their own or earlier stages."""
+        stages = []
+        current = []
+        for level in ArchiveSubmission.get_creation_levels(converted_entities):
+            if len(current) + len(level) <= max_size:
+                current.extend(level)
+                continue
+            if current:
+                stages.append([current])
+            if len(level) <= max_size:
+                current = list(level)
+            else:
+                stages.append([level[start:start + max_size] for start in range(0, len(level), max_size)])
+                current = []
+        if current:
+            stages.append([current])
+        return stages
+
+    @staticmethod
+    def _get_sample_levels(samples):
+        samples_by_alias = {sample.id: sample for sample in samples}
+        depths = {}
+
+        def get_depth(sample):
+            if sample.id in depths:
+                return depths[sample.id]
+            depths[sample.id] = 0
+            derived_from_aliases = [relationship.get('alias')
+                                    for relationship in sample.conversion.get('sampleRelationships', [])]
+            parents = [samples_by_alias[alias] for alias in derived_from_aliases if alias in samples_by_alias]
+            depths[sample.id] = max([get_depth(parent) + 1 for parent in parents], default=0)
+            return depths[sample.id]
+
+        levels = []
+        for sample in samples:
+            depth = get_depth(sample)
+            while len(levels) <= depth:
+                levels.append([])
+            levels[depth].append(sample)
+        return levels
 
     def validate(self):
         if not self.submission:
@@ -325,18 +557,13 @@ class ArchiveSubmission:
 
         is_validated = False
         try:
-            is_validated = polling.poll(
-                lambda: self.is_validated(),
-                step=config.VALIDATION_POLLING_STEP,
-                timeout=config.VALIDATION_POLLING_TIMEOUT if not config.VALIDATION_POLL_FOREVER else None,
-                poll_forever=True if config.VALIDATION_POLL_FOREVER else False
-            )
-        except polling.TimeoutException as te:
+            is_validated = self.poll_validation(self.is_validated)
+        except PollTimeoutException:
             self.errors.append({
                 "error_message": "DSP validation takes too long to complete.",
             })
 
-        if is_validated and self.get_all_validation_errors():
+        if is_validated and self.has_validation_errors():
             validation_summary = self.get_all_validation_result_details()
             self.errors.append({
                 "error_message": "Failed in DSP validation.",
@@ -357,18 +584,13 @@ class ArchiveSubmission:
 
         is_validated = False
         try:
-            is_validated = polling.poll(
-                lambda: self.is_ready_to_submit(),
-                step=config.VALIDATION_POLLING_STEP,
-                timeout=config.VALIDATION_POLLING_TIMEOUT if not config.VALIDATION_POLL_FOREVER else None,
-                poll_forever=True if config.VALIDATION_POLL_FOREVER else False
-            )
-        except polling.TimeoutException as te:
+            is_validated = self.poll_validation(self.is_ready_to_submit)
+        except PollTimeoutException:
             self.errors.append({
                 "error_message": "DSP validation takes too long to complete.",
             })
 
-        if is_validated and self.get_all_validation_errors():
+        if is_validated and self.has_validation_errors():
             validation_summary = self.get_all_validation_result_details()
             self.validation_result = validation_summary
             self.errors.append({
@@ -389,20 +611,48 @@ class ArchiveSubmission:
 
         print("DSP Submission is submitted! Waiting for the submission result. Please do not submit again.")
 
+        scheduler = self._create_poll_scheduler(config.SUBMISSION_POLLING_STEP, config.SUBMISSION_POLLING_MAX_STEP,
+                                                config.SUBMISSION_POLLING_TIMEOUT, config.SUBMISSION_POLL_FOREVER)
         try:
-            self.is_completed = polling.poll(
-                lambda: self.is_processing_complete(),
-                step=config.SUBMISSION_POLLING_STEP,
-                timeout=config.SUBMISSION_POLLING_TIMEOUT if not config.SUBMISSION_POLL_FOREVER else None,
-                poll_forever=True if config.SUBMISSION_POLL_FOREVER else False
-            )
+            self.is_completed = scheduler.poll(self.is_processing_complete,
+                                               get_pending=lambda: self.pending_processing_count)
 
             self.process_result()
 
-        except polling.TimeoutException:
+        except PollTimeoutException:
             self.errors.append({
                 "error_message": "DSP submission takes too long to complete.",
             })
+        finally:
+            self.polling_stats['submission'] = scheduler.get_stats()
+
+    def poll_validation(self, is_done):
+        # every polling run starts from a full listing of the validation results
+        self.validation_snapshot = None
+        self.validation_summary = None
+        scheduler = self._create_poll_scheduler(config.VALIDATION_POLLING_STEP, config.VALIDATION_POLLING_MAX_STEP,
+                                                config.VALIDATION_POLLING_TIMEOUT, config.VALIDATION_POLL_FOREVER)
+        try:
+            return scheduler.poll(is_done, get_pending=self.get_pending_validation_count)
+        finally:
+            self.polling_stats['validation'] = scheduler.get_stats()
+
+    def get_pending_validation_count(self):
+        if self.validation_summary is not None:
+            return self.validation_summary.get('notValidatedCount')
+        if not self.validation_snapshot:
+            return None
+        return self.validation_snapshot.get_pending_count()
+
+    def get_size(self):
+        return len(self.converted_entities)
+
+    def _create_poll_scheduler(self, step, max_step, timeout, poll_forever):
+        return PollScheduler(step=step,
+                             max_step=max_step,
+                             timeout=None if poll_forever else timeout,
+                             size=self.get_size(),
+                             entities_per_step=config.POLLING_ENTITIES_PER_STEP)
 
     def process_result(self):
         self.processing_result = self.get_processing_results()
@@ -417,6 +667,8 @@ class ArchiveSubmission:
                                    f"{result.get('submittableType', '')} with alias {result.get('alias', '')} to "
                                    f"{result.get('archive', '')}.")
         self.accession_map = accession_map
+        if self.ledger:
+            self.ledger.record(accession_map, submission_url=self.get_url())
 
         return self
 
@@ -424,7 +676,9 @@ class ArchiveSubmission:
         is_validated = self.is_validated()
 
         if is_validated:
-            is_submittable = self.is_submittable()
+            # if the summary reports validation errors they block the submission, its status need not be checked
+            summary = self.validation_summary
+            is_submittable = not (summary and summary.get('hasAnyValidationError')) and self.is_submittable()
             if is_submittable:
                 return True
             else:
@@ -438,52 +692,23 @@ class ArchiveSubmission:
         return False
 
     def get_all_validation_result_details(self):
-        get_validation_results_url = self.submission['_links']['validationResults']['href']
-        validation_results = self.dsp_api.get_validation_results(get_validation_results_url)
-
-        summary = []
-        for validation_result in validation_results:
-            if validation_result['validationStatus'] == "Complete":
-                details_url = validation_result['_links']['validationResult']['href']
-                # TODO fix how what to put as projection param, check dsp documentation, removing any params for now
-                details_url = details_url.split('{')[0]
-                validation_result_details = self.dsp_api.get_validation_result_details(details_url)
-                summary.append(validation_result_details)
-
-        return summary
+        return self.get_validation_snapshot().get_details()
 
     def get_all_validation_errors(self):
-        get_validation_results_url = self.submission['_links']['validationResults']['href']
-        validation_results = self.dsp_api.get_validation_results(get_validation_results_url)
-
-        errors = []
-        for validation_result in validation_results:
-            if validation_result['validationStatus'] == "Complete":
-                details_url = validation_result['_links']['validationResult']['href']
-                # TODO fix how what to put as projection param, check dsp documentation, removing any params for now
-                details_url = details_url.split('{')[0]
-                validation_result_details = self.dsp_api.get_validation_result_details(details_url)
-                if validation_result_details.get('errorMessages'):
-                    errors.append(validation_result_details.get('errorMessages'))
-        return errors
+        return self.get_validation_snapshot().get_errors()
 
     def get_validation_error_report(self):
-        get_validation_results_url = self.submission['_links']['validationResults']['href']
-        validation_results = self.dsp_api.get_validation_results(get_validation_results_url)
+        return self.get_validation_snapshot().get_error_report()
 
-        report = {}
-        for validation_result in validation_results:
-            if validation_result['validationStatus'] == "Complete":
-                details_url = validation_result['_links']['validationResult']['href']
-                details_url = details_url.split('{')[0]
-                validation_result_details = self.dsp_api.get_validation_result_details(details_url)
-                submittable_href = validation_result_details['_links']['submittable']['href']
-                if submittable_href and validation_result_details.get('errorMessages'):
-                    if not report.get(submittable_href):
-                        report[submittable_href] = []
-                    report[submittable_href].append(validation_result_details.get('errorMessages'))
+    def get_validation_snapshot(self):
+        """Returns the snapshot taken in the current poll cycle, or takes one if there is none yet."""
+        if not self.validation_snapshot:
+            self.take_validation_snapshot()
+        return self.validation_snapshot
 
-        return report
+    def take_validation_snapshot(self):
+        self.validation_snapshot = ValidationSnapshot(self.dsp_api, self.submission, previous=self.validation_snapshot)
+        return self.validation_snapshot
 
     def is_submittable(self):
         get_status_url = self.submission['_links']['submissionStatus']['href']
@@ -499,25 +724,46 @@ class ArchiveSubmission:
         return False
 
     def is_validated(self):
-        get_validation_results_url = self.submission['_links']['validationResults']['href']
-        validation_results = self.dsp_api.get_validation_results(get_validation_results_url)
-
-        for validation_result in validation_results:
-            if validation_result['validationStatus'] != "Complete":
-                return False
-
-        return True
+        # a single request per poll if DSP summarises the submission blockers, the validation results are only paged
+        # once the validation error details are needed
+        self.validation_summary = self.get_validation_summary()
+        if self.validation_summary is not None and 'notValidatedCount' in self.validation_summary:
+            self.validation_snapshot = None
+            return self.validation_summary['notValidatedCount'] == 0
+
+        # otherwise every poll starts a new snapshot, the validation error lookups that follow are answered from it
+        self.validation_summary = None
+        return self.take_validation_snapshot().is_validated()
+
+    def get_validation_summary(self):
+        """Returns the DSP summary of what blocks the submission, None if DSP does not link one."""
+        if not self.submission['_links'].get('submissionBlockersSummary'):
+            return None
+        return self.dsp_api.get_submission_blockers_summary(self.submission)
+
+    def has_validation_errors(self):
+        if self.validation_summary is not None and 'hasAnyValidationError' in self.validation_summary:
+            return bool(self.validation_summary['hasAnyValidationError'])
+        return bool(self.get_all_validation_errors())
 
     def is_validated_and_submittable(self):
         return self.is_validated(self.submission) and self.is_submittable(self.submission)
 
     def is_processing_complete(self):
-        results = self.dsp_api.get_processing_results(self.submission)
-        for result in results:
-            if result['status'] != "Completed" and result['status'] != "Error":
-                return False
+        # a single request per poll, the processing results are only paged once complete, in process_result
+        summary = None
+        if self.submission['_links'].get('processingStatusSummary'):
+            summary = self.dsp_api.get_processing_summary(self.submission)
+        if summary:
+            pending_count = sum(count for status, count in summary.items()
+                                if status not in PROCESSING_FINAL_STATUSES)
+        else:
+            # an empty summary does not tell pending from done, the results do
+            results = self.dsp_api.get_processing_results(self.submission)
+            pending_count = len([result for result in results if result['status'] not in PROCESSING_FINAL_STATUSES])
+        self.pending_processing_count = pending_count
 
-        return True
+        return pending_count == 0
 
     def delete_submission(self):
         delete_url = self.submission['_links']['self:delete']['href']
@@ -527,9 +773,8 @@ class ArchiveSubmission:
         return self.dsp_api.get_processing_results(self.submission)
 
     def get_url(self):
-        # TODO remove projection placeholder
         if self.submission:
-            return self.submission['_links']['self']['href'].split('{')[0]
+            return DataSubmissionPortal.get_link_url(self.submission, 'self')
 
         return None
 
@@ -546,12 +791,59 @@ class ArchiveSubmission:
         report['completed'] = self.is_completed
         report['submission_errors'] = self.errors
         report['file_upload_info'] = self.file_upload_info
+        report['polling'] = self.polling_stats
+        validation_stats = self.polling_stats.get('validation', {})
+        report['time_to_validation'] = validation_stats.get('elapsed_seconds') if validation_stats.get('completed') else None
+
+        return report
+
+
+class PartitionedArchiveSubmission:
+    def __init__(self, entity_map: ArchiveEntityMap):
+        self.entity_map = entity_map
+        self.stages = []
+        self.errors = []
+
+    def get_submissions(self):
+        return [submission for stage in self.stages for submission in stage]
+
+    def is_completed(self):
+        return bool(self.stages) and all(submission.is_completed for submission in self.get_submissions())
+
+    def get_file_upload_info(self):
+        return [message for submission in self.get_submissions() for message in submission.file_upload_info]
+
+    def generate_report(self):
+        report = {}
+        map_report = self.entity_map.generate_report()
+        report['entities'] = map_report['entities']
+        report['conversion_summary'] = map_report['conversion_summary']
+
+        report['submissions'] = []
+        accessions = {}
+        for stage_index, stage in enumerate(self.stages):
+            for submission in stage:
+                report['submissions'].append({
+                    'stage': stage_index,
+                    'submission_url': submission.get_url(),
+                    'entity_count': len(submission.converted_entities),
+                    'completed': submission.is_completed,
+                    'submission_errors': submission.errors,
+                    'polling': submission.polling_stats
+                })
+                accessions.update(submission.accession_map or {})
+
+        report['accessions'] = accessions
+        report['completed'] = self.is_completed()
+        report['submission_errors'] = self.errors
+        report['file_upload_info'] = self.get_file_upload_info()
 
         return report
 
 
 class IngestArchiver:
-    def __init__(self, ingest_api, dsp_api, ontology_api=ontology.__api__, exclude_types=None, alias_prefix=None, dsp_validation=True):
+    def __init__(self, ingest_api, dsp_api, ontology_api=ontology.__api__, exclude_types=None, alias_prefix=None,
+                 dsp_validation=True, workers=1, ledger=None):
         self.logger = logging.getLogger(__name__)
         self.ingest_api = ingest_api
         self.exclude_types = exclude_types if exclude_types else []
@@ -559,6 +851,11 @@ class IngestArchiver:
         self.ontology_api = ontology_api
         self.dsp_api = dsp_api
         self.dsp_validation = dsp_validation
+        self.workers = get_worker_count(workers)
+        self.metadata_index = None
+        # (entity type, alias) to the current version of the entity in DSP, None if it has not been archived
+        self.current_versions = {}
+        self.ledger = ledger
 
         self.converter = {
             "project": ProjectConverter(ontology_api=ontology_api),
@@ -576,8 +873,8 @@ class IngestArchiver:
         archive_submission.validate_and_submit()
         return archive_submission
 
-    def archive_metadata(self, entity_map: ArchiveEntityMap):
-        archive_submission = ArchiveSubmission(dsp_api=self.dsp_api)
+    def archive_metadata(self, entity_map: ArchiveEntityMap, checkpoint_dir=None):
+        archive_submission = ArchiveSubmission(dsp_api=self.dsp_api, ledger=self.ledger)
         archive_submission.entity_map = entity_map
 
         converted_entities = list(entity_map.get_converted_entities())
@@ -586,7 +883,7 @@ class IngestArchiver:
             archive_submission.converted_entities = converted_entities
             archive_submission.submission = self.dsp_api.create_submission()
             print(f"DSP SUBMISSION: {archive_submission.get_url()}")
-            archive_submission.add_entities(archive_submission.converted_entities)
+            self._add_entities(archive_submission, checkpoint_dir)
         else:
             archive_submission.is_completed = True
             archive_submission.errors.append({
@@ -596,8 +893,70 @@ class IngestArchiver:
 
         return archive_submission
 
+    def archive_partitioned(self, entity_map: ArchiveEntityMap, max_submission_size, submit=True,
+                            on_stage_created=None):
+        """Archives in submissions of at most max_submission_size entities, stage by stage."""
+        partitioned_submission = PartitionedArchiveSubmission(entity_map)
+        stages = ArchiveSubmission.partition(list(entity_map.get_converted_entities()), max_submission_size)
+        if not stages:
+            partitioned_submission.errors.append({
+                "error_message": "No entities found to submit."
+            })
+            return partitioned_submission
+
+        for stage_index, chunks in enumerate(stages):
+            print(f"Creating {len(chunks)} DSP submissions for stage {stage_index + 1} of {len(stages)}...")
+            with ThreadPoolExecutor(max_workers=config.DSP_PARALLEL_SUBMISSIONS) as executor:
+                submissions = list(executor.map(self._archive_chunk, chunks))
+                partitioned_submission.stages.append(submissions)
+                if on_stage_created:
+                    on_stage_created(partitioned_submission)
+
+                if submit:
+                    list(executor.map(lambda submission: submission.validate_and_submit(), submissions))
+                else:
+                    list(executor.map(lambda submission: submission.validate(), submissions))
+
+            if stage_index + 1 < len(stages) and not all(submission.is_completed for submission in submissions):
+                partitioned_submission.errors.append({
+                    "error_message": f"Stage {stage_index + 1} of {len(stages)} was not completed, the later stages "
+                                     f"reference its entities and have not been created."
+                })
+                break
+
+        return partitioned_submission
+
+    def _archive_chunk(self, entities):
+        entity_map = ArchiveEntityMap()
+        entity_map.add_entities(entities)
+        archive_submission = self.archive_metadata(entity_map)
+        self.notify_file_archiver(archive_submission)
+        return archive_submission
+
+    def resume_metadata(self, entity_map: ArchiveEntityMap, dsp_submission_url, checkpoint_dir=None):
+        """Adds the entities of the map that are still missing from an existing DSP submission to it."""
+        archive_submission = ArchiveSubmission(dsp_api=self.dsp_api, dsp_submission_url=dsp_submission_url,
+                                               ledger=self.ledger)
+        archive_submission.entity_map = entity_map
+        archive_submission.converted_entities = list(entity_map.get_converted_entities())
+        print(f"DSP SUBMISSION: {archive_submission.get_url()}")
+        self._add_entities(archive_submission, checkpoint_dir, resume=True)
+        return archive_submission
+
+    def _add_entities(self, archive_submission: ArchiveSubmission, checkpoint_dir=None, resume=False):
+        checkpoint = None
+        if checkpoint_dir:
+            submission_uuid = archive_submission.get_url().rsplit('/', 1)[-1]
+            checkpoint = AddEntitiesCheckpoint(os.path.join(checkpoint_dir, f'ADD_ENTITIES_{submission_uuid}.jsonl'))
+        try:
+            archive_submission.add_entities(archive_submission.converted_entities, checkpoint=checkpoint, resume=resume)
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
     def complete_submission(self, dsp_submission_url):
-        archive_submission = ArchiveSubmission(dsp_api=self.dsp_api, dsp_submission_url=dsp_submission_url)
+        archive_submission = ArchiveSubmission(dsp_api=self.dsp_api, dsp_submission_url=dsp_submission_url,
+                                               ledger=self.ledger)
 
         if archive_submission.status == 'Draft':
             archive_submission.validate_and_submit()
@@ -607,78 +966,190 @@ class IngestArchiver:
 
         return archive_submission
 
+    def load_metadata_index(self, project_uuid):
+        self.metadata_index = MetadataIndex(self.ingest_api, workers=self.workers).load_project(project_uuid)
+        return self.metadata_index
+
     def get_manifest(self, manifest_id):
-        return Manifest(ingest_api=self.ingest_api, manifest_id=manifest_id)
+        return Manifest(ingest_api=self.metadata_index or self.ingest_api, manifest_id=manifest_id)
 
     def convert(self, manifests):
+        archive_entities = self._aggregate_manifests(manifests)
         entity_map = ArchiveEntityMap()
-        for idx, manifest_url in enumerate(manifests):
-            manifest_id = manifest_url.rsplit('/', 1)[-1]
-            print(f'\n* PROCESSING MANIFEST {idx + 1}/{len(manifests)}: {manifest_id}')
-            manifest = self.get_manifest(manifest_id)
-            entities = self._convert(manifest)
-            entity_map.add_entities(entities)
+        entity_map.add_entities(self._convert(archive_entities))
         return entity_map
 
-    def _convert(self, manifest: Manifest):
+    def _aggregate_manifests(self, manifests):
+        manifest_ids = [manifest_url.rsplit('/', 1)[-1] for manifest_url in manifests]
+        if self.workers > 1:
+            entities_per_manifest = self._aggregate_concurrently(manifest_ids)
+        else:
+            entities_per_manifest = []
+            for idx, manifest_id in enumerate(manifest_ids):
+                print(f'\n* PROCESSING MANIFEST {idx + 1}/{len(manifest_ids)}: {manifest_id}')
+                entities_per_manifest.append(self._aggregate_manifest(manifest_id))
+
+        # manifests share projects, studies and donors, each alias is converted once on behalf of all of them
+        unique_entities = {}
+        for entities in entities_per_manifest:
+            for archive_entity in entities:
+                key = (archive_entity.archive_entity_type, archive_entity.id)
+                unique_entity = unique_entities.setdefault(key, archive_entity)
+                if archive_entity.manifest_id not in unique_entity.manifest_ids:
+                    unique_entity.manifest_ids.append(archive_entity.manifest_id)
+
+        return list(unique_entities.values())
+
+    def _aggregate_concurrently(self, manifest_ids):
+        print(f'\n* PROCESSING {len(manifest_ids)} MANIFESTS WITH {self.workers} WORKERS')
+
+        entities_per_manifest = []
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        # workers do not print, the progress of each manifest is printed from here once it is done
+        futures = [executor.submit(self._aggregate_manifest, manifest_id, False) for manifest_id in manifest_ids]
+        try:
+            # results are merged in the order of the manifest list so that the entity map is deterministic
+            for idx, future in enumerate(futures):
+                try:
+                    entities = future.result()
+                except Exception as e:
+                    for pending_future in futures:
+                        pending_future.cancel()
+                    raise ArchiverError(f'Failed to process manifest {manifest_ids[idx]}: {str(e)}') from e
+                entities_per_manifest.append(entities)
+                print(f'\n* PROCESSED MANIFEST {idx + 1}/{len(manifest_ids)}: {manifest_ids[idx]}, '
+                      f'found {len(entities)} entities')
+        finally:
+            executor.shutdown(wait=True)
+
+        return entities_per_manifest
+
+    def _aggregate_manifest(self, manifest_id, verbose=True):
+        manifest = self.get_manifest(manifest_id)
+        return self._aggregate(manifest, verbose)
+
+    def _aggregate(self, manifest: Manifest, verbose=True):
         aggregator = ArchiveEntityAggregator(manifest, self.ingest_api, alias_prefix=self.alias_prefix)
 
         entities = []
         for archive_entity_type in ["project", "study", "sample", "sequencingExperiment", "sequencingRun"]:
-            print(f"Finding {archive_entity_type} entities in manifest...")
-            progress_ctr = 0
+            if verbose:
+                print(f"Finding {archive_entity_type} entities in manifest...")
 
             if self.exclude_types and archive_entity_type in self.exclude_types:
-                print(f"Skipping {archive_entity_type} entities in manifest...")
+                if verbose:
+                    print(f"Skipping {archive_entity_type} entities in manifest...")
                 continue
 
-            for archive_entity in aggregator.get_archive_entities(archive_entity_type):
-                progress_ctr = progress_ctr + 1
-                _print_same_line(str(progress_ctr))
-
-                converter = self.converter[archive_entity_type]
-
-                if self.dsp_validation:
-                    current_version = self.dsp_api.get_current_version(archive_entity.archive_entity_type,
-                                                                   archive_entity.id)
-                    if current_version and current_version.get('accession'):
-                        archive_entity.accession = current_version.get('accession')
-                        archive_entity.errors.append({
-                            "error_message": f"This alias has already been submitted to DSP, accession: {archive_entity.accession}.",
-                            "details": {
-                                "current_version": current_version["_links"]["self"]["href"]
-                            }
-                        })
-                    elif current_version and not current_version.get('accession'):
-                        archive_entity.errors.append({
-                            "error_message": f'This alias has already been submitted to DSP, but still has no accession.',
-                            "details": {
-                                "current_version": current_version["_links"]["self"]["href"]
-                            }
-                        })
-
-                    elif IngestArchiver.is_metadata_accessioned(archive_entity):
-                        archive_entity.errors.append({
-                            "error_message": 'Metadata already have an accession'
-                        })
-
-                if not archive_entity.errors:
-                    try:
-                        archive_entity.conversion = converter.convert(archive_entity.data)
-                        archive_entity.conversion['alias'] = archive_entity.id
-                        archive_entity.conversion.update(archive_entity.links)
-
-                    except ConversionError as e:
-                        archive_entity.errors.append({
-                            "error_message": f'An error occured converting data to a {archive_entity_type}: {str(e)}.',
-                            "details": {"data": json.dumps(archive_entity.data)}
-                        })
-
-                entities.append(archive_entity)
-            print("")
+            archive_entities = aggregator.get_archive_entities(archive_entity_type)
+            if verbose:
+                print(f"Found {len(archive_entities)} {archive_entity_type} entities in manifest.")
+            entities.extend(archive_entities)
 
         return entities
 
+    def _convert(self, archive_entities):
+        if self.dsp_validation:
+            # only the aliases that are not in the ledger of earlier runs are looked up in DSP
+            unknown_entities = [archive_entity for archive_entity in archive_entities
+                                if not self._check_ledger(archive_entity)]
+            print(f"Checking {len(unknown_entities)} unique entities in DSP...")
+            self._load_current_versions(unknown_entities)
+            for archive_entity in unknown_entities:
+                self._check_current_version(archive_entity)
+
+        entities_to_convert = [archive_entity for archive_entity in archive_entities if not archive_entity.errors]
+        ontology_terms = self._resolve_ontology_terms(entities_to_convert)
+        for converter in self.converter.values():
+            converter.ontology_terms = ontology_terms
+
+        print(f"Converting {len(entities_to_convert)} unique entities...")
+        progress_ctr = 0
+        for archive_entity in entities_to_convert:
+            progress_ctr = progress_ctr + 1
+            _print_same_line(str(progress_ctr))
+
+            archive_entity_type = archive_entity.archive_entity_type
+            converter = self.converter[archive_entity_type]
+            try:
+                archive_entity.conversion = converter.convert(archive_entity.data)
+                archive_entity.conversion['alias'] = archive_entity.id
+                archive_entity.conversion.update(archive_entity.links)
+
+            except ConversionError as e:
+                archive_entity.errors.append({
+                    "error_message": f'An error occured converting data to a {archive_entity_type}: {str(e)}.',
+                    "details": {"data": json.dumps(archive_entity.data)}
+                })
+        print("")
+
+        return archive_entities
+
+    def _check_ledger(self, archive_entity: ArchiveEntity):
+        archived = self.ledger.get(archive_entity.id) if self.ledger else None
+        if not archived:
+            return False
+
+        archive_entity.accession = archived['accession']
+        archive_entity.errors.append({
+            "error_message": f"This alias has already been submitted to DSP, accession: {archive_entity.accession}.",
+            "details": {
+                "submission_url": archived['submission_url']
+            }
+        })
+        return True
+
+    def _load_current_versions(self, archive_entities):
+        # looks up every alias up front so that the checks below do not wait on DSP one entity at a time
+        entity_keys = [(archive_entity.archive_entity_type, archive_entity.id) for archive_entity in archive_entities
+                       if (archive_entity.archive_entity_type, archive_entity.id) not in self.current_versions]
+        if entity_keys:
+            self.current_versions.update(
+                self.dsp_api.get_current_versions(entity_keys, workers=config.DSP_CURRENT_VERSION_WORKERS))
+
+    def _get_current_version(self, archive_entity: ArchiveEntity):
+        key = (archive_entity.archive_entity_type, archive_entity.id)
+        if key not in self.current_versions:
+            self.current_versions[key] = self.dsp_api.get_current_version(*key)
+        return self.current_versions[key]
+
+    def _check_current_version(self, archive_entity: ArchiveEntity):
+        current_version = self._get_current_version(archive_entity)
+        if current_version and current_version.get('accession'):
+            archive_entity.accession = current_version.get('accession')
+            archive_entity.errors.append({
+                "error_message": f"This alias has already been submitted to DSP, accession: {archive_entity.accession}.",
+                "details": {
+                    "current_version": current_version["_links"]["self"]["href"]
+                }
+            })
+            if self.ledger:
+                self.ledger.record({archive_entity.id: archive_entity.accession})
+        elif current_version and not current_version.get('accession'):
+            archive_entity.errors.append({
+                "error_message": f'This alias has already been submitted to DSP, but still has no accession.',
+                "details": {
+                    "current_version": current_version["_links"]["self"]["href"]
+                }
+            })
+
+        elif IngestArchiver.is_metadata_accessioned(archive_entity):
+            archive_entity.errors.append({
+                "error_message": 'Metadata already have an accession'
+            })
+
+    def _resolve_ontology_terms(self, archive_entities):
+        # resolves every term up front so that conversion reads them from this lookup instead of waiting on OLS
+        terms = set()
+        for archive_entity in archive_entities:
+            converter = self.converter[archive_entity.archive_entity_type]
+            terms.update(converter.get_ontology_terms(archive_entity.data))
+
+        if terms:
+            print(f"Resolving {len(terms)} ontology terms...")
+            return self.ontology_api.expand_curies(terms, workers=config.ONTOLOGY_WORKERS)
+        return {}
+
     # TODO save notification to file for now, should be sending to rabbit mq in the future
     def notify_file_archiver(self, archive_submission: ArchiveSubmission):
 
@@ -0,0 +1,44 @@
+import json
+import os
+import threading
+
+
+# append-only JSON lines record of the entities added to a submission, so add_entities can be resumed
+class AddEntitiesCheckpoint:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self):
+        """Returns the json of the recorded entities by alias, lines cut short by a crash are ignored."""
+        entities = {}
+        if not os.path.exists(self.path):
+            return entities
+
+        with open(self.path, encoding='utf-8') as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                entities[record['alias']] = {'alias': record['alias'],
+                                             '_links': {'self': {'href': record['entity_url']}}}
+        return entities
+
+    def record(self, alias, entity_url):
+        line = json.dumps({'alias': alias, 'entity_url': entity_url}) + '\n'
+        with self._lock:
+            if not self._file:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                if not os.path.exists(directory):
+                    os.makedirs(directory)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
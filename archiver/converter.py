@@ -29,6 +29,8 @@ class Converter:
         self.exclude_fields_match = ['__schema_type', '__describedBy', '__ontology_label']
         self.ingest_api = None
         self.ontology_api = ontology_api
+        # term to iri lookup resolved before conversion, terms missing from it are expanded with the ontology api
+        self.ontology_terms = {}
         self.remove_input_prefix = False
         self.to_lowercase_attributes = False
 
@@ -48,6 +50,16 @@ class Converter:
                                   details={'data': hca_data})
         return converted_data
 
+    def expand_curie(self, term):
+        iri = self.ontology_terms.get(term)
+        return iri if iri else self.ontology_api.expand_curie(term)
+
+    def get_ontology_terms(self, hca_data):
+        # the same fields _extract_attributes expands
+        flattened_hca_data = self._flatten(hca_data)
+        return {value for key, value in flattened_hca_data.items()
+                if re.search('__content__', key) and key not in self.field_mapping and '__ontology' in key and value}
+
     def _flatten(self, hca_data):
         input_data = dict(hca_data)
 
@@ -105,7 +117,7 @@ class Converter:
                     attr = {
                         "value": text,
                         "terms": [{
-                            "url": self.ontology_api.expand_curie(value)
+                            "url": self.expand_curie(value)
                         }]
                     }
                     text_field = text_field.replace(prefix, '')
@@ -218,7 +230,10 @@ class SequencingExperimentConverter(Converter):
         self.logger = logging.getLogger(__name__)
 
     def convert(self, hca_data):
-        return ena_sequencing_experiment.convert(hca_data)
+        return ena_sequencing_experiment.convert(hca_data, expand_curie=self.expand_curie)
+
+    def get_ontology_terms(self, hca_data):
+        return ena_sequencing_experiment.get_ontology_terms(hca_data)
 
     # TODO implement
     def _build_links(self, extracted_data, links):
@@ -287,6 +302,9 @@ class ProjectConverter(Converter):
     def convert(self, hca_data):
         return project.convert(hca_data)
 
+    def get_ontology_terms(self, hca_data):
+        return set()
+
 
 class StudyConverter(Converter):
 
@@ -295,6 +313,9 @@ class StudyConverter(Converter):
         self.logger = logging.getLogger(__name__)
         self.study_prefix = 'study_'
 
+    def get_ontology_terms(self, hca_data):
+        return set()
+
     def convert(self, hca_data):
         # TODO maybe extract this to a separate component
         return JsonMapper(hca_data).map({
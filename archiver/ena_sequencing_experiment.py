@@ -30,16 +30,28 @@ def taxon_id_attribute(*args):
 
 def ontology_term(*args):
     term = args[0]
+    expand_curie = args[1] if len(args) > 1 else _ontology_api.expand_curie
 
     if not term:
         return None
 
     return [{
-        'terms': [{'url': _ontology_api.expand_curie(term)}],
+        'terms': [{'url': expand_curie(term)}],
         'value': term
     }]
 
 
+def get_ontology_terms(hca_data: dict):
+    """Returns the terms that convert() expands with ontology_term."""
+    lp_content = hca_data.get('library_preparation_protocol', {}).get('content', {})
+    sp_content = hca_data.get('sequencing_protocol', {}).get('content', {})
+    terms = {
+        lp_content.get('library_construction_method', {}).get('ontology_label'),
+        sp_content.get('sequencing_approach', {}).get('text')
+    }
+    return {term for term in terms if term}
+
+
 def nominal_value(*args):
     value = args[0]
     if value:
@@ -54,7 +66,8 @@ def instrument_model(*args):
     return dsp_attribute(to_dsp_name(hca_name))
 
 
-def convert(hca_data: dict):
+def convert(hca_data: dict, expand_curie=None):
+    expand_curie = expand_curie if expand_curie else _ontology_api.expand_curie
     # added these for easier typing
     sp = 'sequencing_protocol'
     lp = 'library_preparation_protocol'
@@ -82,7 +95,7 @@ def convert(hca_data: dict):
                 [f'{ib}.content.biomaterial_core.ncbi_taxon_id', taxon_id_attribute],
             'Library Preparation Protocol - End Bias': [f'{lp}.content.end_bias', dsp_attribute],
             'Library Preparation Protocol - Library Construction Method':
-                [f'{lp}.content.library_construction_method.ontology_label', ontology_term],
+                [f'{lp}.content.library_construction_method.ontology_label', ontology_term, expand_curie],
             'Library Preparation Protocol - Nucleic Acid Source':
                 [f'{lp}.content.nucleic_acid_source', dsp_attribute],
             'Library Preparation Protocol - Primer': [f'{lp}.content.primer', dsp_attribute],
@@ -93,7 +106,8 @@ def convert(hca_data: dict):
             'Sequencing Protocol - Paired End': [f'{sp}.content.paired_end', dsp_attribute],
             'Sequencing Protocol - Protocol Core - Protocol Id':
                 [f'{sp}.content.protocol_core.protocol_id', dsp_attribute],
-            'Sequencing Protocol - Sequencing Approach': [f'{sp}.content.sequencing_approach.text', ontology_term],
+            'Sequencing Protocol - Sequencing Approach':
+                [f'{sp}.content.sequencing_approach.text', ontology_term, expand_curie],
             'library_strategy': ['', fixed_dsp_attribute, 'OTHER'],
             'library_source': ['', fixed_dsp_attribute, 'TRANSCRIPTOMIC SINGLE CELL'],
             'library_selection': [f'{lp}.content.primer', map_primer],
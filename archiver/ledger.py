@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import threading
+import time
+
+from utils.bloom import BloomFilter
+
+
+# SQLite record of the aliases archived by earlier runs, with a Bloom filter in front of the lookups
+class AccessionLedger:
+    def __init__(self, path, error_rate=0.01):
+        self.path = path
+        self.error_rate = error_rate
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS ledger (alias TEXT PRIMARY KEY, '
+                                     'accession TEXT NOT NULL, submission_url TEXT, recorded_at REAL NOT NULL)')
+        self._load_filter()
+
+    def get(self, alias):
+        """Returns the accession and submission url archived for the alias, None if it is not in the ledger."""
+        if alias not in self._filter:
+            return None
+
+        with self._lock:
+            row = self._connection.execute('SELECT accession, submission_url FROM ledger WHERE alias = ?',
+                                           (alias,)).fetchone()
+        if row is None:
+            return None
+        return {'accession': row[0], 'submission_url': row[1]}
+
+    def record(self, accession_map, submission_url=None):
+        """Records the alias to accession map of a submission, an alias that is already in the ledger is updated."""
+        if not accession_map:
+            return
+
+        now = time.time()
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO ledger (alias, accession, submission_url, recorded_at) VALUES (?, ?, ?, ?)',
+                    [(alias, accession, submission_url, now) for alias, accession in accession_map.items()])
+            for alias in accession_map:
+                self._filter.add(alias)
+            if self._filter.is_full():
+                self._load_filter()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __contains__(self, alias):
+        return self.get(alias) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM ledger').fetchone()[0]
+
+    def _load_filter(self):
+        # sized with room to grow, the filter is rebuilt once it fills up
+        count = self._connection.execute('SELECT COUNT(*) FROM ledger').fetchone()[0]
+        bloom_filter = BloomFilter(capacity=max(count * 2, 10000), error_rate=self.error_rate)
+        for (alias,) in self._connection.execute('SELECT alias FROM ledger'):
+            bloom_filter.add(alias)
+        self._filter = bloom_filter
@@ -0,0 +1,97 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from api.ingest import IngestAPI
+from utils.concurrency import get_worker_count
+
+PROCESS_RELATIONS = [
+    ('inputBiomaterials', 'biomaterials'),
+    ('derivedBiomaterials', 'biomaterials'),
+    ('derivedFiles', 'files'),
+    ('protocols', 'protocols')
+]
+
+# relations answered from the reverse of a process relation
+DERIVED_BY_RELATIONS = ['derivedBiomaterials', 'derivedFiles']
+
+
+# answers the IngestAPI lookups of Manifest from metadata loaded in bulk, anything else goes to the IngestAPI
+class MetadataIndex:
+    def __init__(self, ingest_api: IngestAPI, workers=1):
+        self.logger = logging.getLogger(__name__)
+        self.ingest_api = ingest_api
+        self.workers = get_worker_count(workers)
+        self.url = ingest_api.url
+
+        self.entities_by_uuid = {}
+        self.process_uuids = set()
+        self.relations = {}
+
+    def load(self, container):
+        """Pages through the biomaterials, processes, protocols and files of a project or submission envelope."""
+        for entity_type in ['biomaterials', 'processes', 'protocols', 'files']:
+            entities = self.ingest_api.get_related_entity(container, entity_type, entity_type)
+            self.logger.info(f'Loaded {len(entities)} {entity_type}')
+            for entity in entities:
+                self._add_entity(entity)
+                if entity_type == 'processes':
+                    self.process_uuids.add(self._get_uuid(entity))
+
+        processes = [self.entities_by_uuid[uuid] for uuid in sorted(self.process_uuids)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            process_relations = executor.map(self._get_process_relations, processes)
+            for process, relations in zip(processes, process_relations):
+                self._index_process(process, relations)
+
+        return self
+
+    def load_project(self, project_uuid):
+        project = self.ingest_api.get_project_by_uuid(project_uuid)
+        self._add_entity(project)
+        return self.load(project)
+
+    def get_manifest_by_id(self, manifest_id):
+        return self.ingest_api.get_manifest_by_id(manifest_id)
+
+    def get_project_by_uuid(self, project_uuid):
+        return self.entities_by_uuid.get(project_uuid) or self.ingest_api.get_project_by_uuid(project_uuid)
+
+    def get_biomaterial_by_uuid(self, biomaterial_uuid):
+        return self.entities_by_uuid.get(biomaterial_uuid) or self.ingest_api.get_biomaterial_by_uuid(biomaterial_uuid)
+
+    def get_file_by_uuid(self, file_uuid):
+        return self.entities_by_uuid.get(file_uuid) or self.ingest_api.get_file_by_uuid(file_uuid)
+
+    def get_related_entity(self, entity, relation, related_entity_type):
+        uuid = self._get_uuid(entity)
+        if (uuid, relation) in self.relations:
+            return list(self.relations[(uuid, relation)])
+        if relation == 'derivedByProcesses' and uuid in self.entities_by_uuid:
+            # every process of the container has been indexed, so a loaded entity with none was not derived
+            return []
+        return self.ingest_api.get_related_entity(entity, relation, related_entity_type)
+
+    def get_concrete_entity_type(self, entity):
+        return self.ingest_api.get_concrete_entity_type(entity)
+
+    def _get_process_relations(self, process):
+        relations = {}
+        for relation, entity_type in PROCESS_RELATIONS:
+            relations[relation] = self.ingest_api.get_related_entity(process, relation, entity_type)
+        return relations
+
+    def _index_process(self, process, relations):
+        process_uuid = self._get_uuid(process)
+        for relation, related_entities in relations.items():
+            self.relations[(process_uuid, relation)] = related_entities
+            if relation in DERIVED_BY_RELATIONS:
+                for related_entity in related_entities:
+                    key = (self._get_uuid(related_entity), 'derivedByProcesses')
+                    self.relations.setdefault(key, []).append(process)
+
+    def _add_entity(self, entity):
+        self.entities_by_uuid.setdefault(self._get_uuid(entity), entity)
+
+    @staticmethod
+    def _get_uuid(entity):
+        return entity['uuid']['uuid']
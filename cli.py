@@ -12,15 +12,26 @@ import sys
 from optparse import OptionParser
 
 import config
+from api import ontology
 from api.dsp import DataSubmissionPortal
 from api.ingest import IngestAPI
 from archiver.archiver import IngestArchiver, ArchiveEntityMap, ArchiveSubmission
+from archiver.ledger import AccessionLedger
+from utils.cache import SQLiteCache
 
 
 class ArchiveCLI:
-    def __init__(self, alias_prefix, output_dir, exclude_types, no_validation):
+    def __init__(self, alias_prefix, output_dir, exclude_types, no_validation, workers=1, cache_dir=None,
+                 ledger_path=None, refresh_cache=False):
         self.manifests = []
-        self.ingest_api = IngestAPI(config.INGEST_API_URL)
+        persistent_cache = None
+        if cache_dir:
+            persistent_cache = SQLiteCache(os.path.join(cache_dir, 'ingest_cache.sqlite'),
+                                           max_age=config.INGEST_PERSISTENT_CACHE_MAX_AGE, refresh=refresh_cache)
+            if not ontology.__api__.persistent_cache:
+                ontology.__api__.persistent_cache = SQLiteCache(os.path.join(cache_dir, 'ontology_cache.sqlite'),
+                                                                max_age=config.ONTOLOGY_CACHE_MAX_AGE)
+        self.ingest_api = IngestAPI(config.INGEST_API_URL, persistent_cache=persistent_cache, workers=workers)
 
         now = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H%M%S")
         self.output_dir = output_dir if output_dir else f"output/ARCHIVER_{now}"
@@ -28,12 +39,18 @@ class ArchiveCLI:
                                        dsp_api=DataSubmissionPortal(config.DSP_API_URL),
                                        exclude_types=self.split_exclude_types(exclude_types),
                                        alias_prefix=alias_prefix,
-                                       dsp_validation=not no_validation)
+                                       dsp_validation=not no_validation,
+                                       workers=workers,
+                                       ledger=AccessionLedger(ledger_path) if ledger_path else None)
 
     def get_manifests_from_project(self, project_uuid):
         logging.info(f'GETTING MANIFESTS FOR PROJECT: {project_uuid}')
         self.manifests = self.ingest_api.get_manifest_ids(project_uuid=project_uuid)
 
+    def load_metadata_index(self, project_uuid):
+        logging.info(f'LOADING METADATA FOR PROJECT: {project_uuid}')
+        self.archiver.load_metadata_index(project_uuid)
+
     def get_manifests_from_list(self, manifest_list_file):
         logging.info(f'GETTING MANIFESTS FROM FILE: {manifest_list_file}')
         with open(manifest_list_file) as f:
@@ -68,8 +85,13 @@ class ArchiveCLI:
         logging.error(f"--load_path files does not have an entities object: {file_content}")
         exit(2)
 
-    def validate_submission(self, entity_map: ArchiveEntityMap, submit):
-        archive_submission = self.archiver.archive_metadata(entity_map)
+    def validate_submission(self, entity_map: ArchiveEntityMap, submit, resume_submission_url=None):
+        # entities added to DSP are checkpointed to the output directory, a run resumed with the same one skips them
+        if resume_submission_url:
+            archive_submission = self.archiver.resume_metadata(entity_map, resume_submission_url,
+                                                               checkpoint_dir=self.output_dir)
+        else:
+            archive_submission = self.archiver.archive_metadata(entity_map, checkpoint_dir=self.output_dir)
         all_messages = self.archiver.notify_file_archiver(archive_submission)
 
         report = archive_submission.generate_report()
@@ -83,8 +105,20 @@ class ArchiveCLI:
         else:
             archive_submission.validate()
 
+    def validate_partitioned_submission(self, entity_map: ArchiveEntityMap, submit, max_submission_size):
+        def save_progress(partitioned_submission):
+            logging.info("Updating Report file...")
+            self.save_dict_to_file("REPORT", partitioned_submission.generate_report())
+            logging.info("##################### FILE ARCHIVER NOTIFICATION")
+            self.save_dict_to_file("FILE_UPLOAD_INFO", {"jobs": partitioned_submission.get_file_upload_info()})
+
+        partitioned_submission = self.archiver.archive_partitioned(entity_map, max_submission_size, submit=submit,
+                                                                   on_stage_created=save_progress)
+        save_progress(partitioned_submission)
+
     def generate_validation_error_report(self, dsp_submission_url):
-        submission = ArchiveSubmission(dsp_api=self.archiver.dsp_api, dsp_submission_url=dsp_submission_url)
+        submission = ArchiveSubmission(dsp_api=self.archiver.dsp_api, dsp_submission_url=dsp_submission_url,
+                                       ledger=self.archiver.ledger)
         self.save_dict_to_file("VALIDATION_ERROR_REPORT", submission.get_validation_error_report())
 
     def save_dict_to_file(self, file_name, json_content):
@@ -176,6 +210,28 @@ if __name__ == '__main__':
                            "false.",
                       action="store_true", default=False)
     parser.add_option("-o", "--output_dir", help="Customise output directory name")
+    parser.add_option("-w", "--workers", type="int", default=1,
+                      help="Number of manifests to convert concurrently, defaults to 1.")
+    parser.add_option("-c", "--cache_dir",
+                      help="Directory of an on-disk cache of Ingest API responses that is reused by later runs. "
+                           "Responses are reused for up to INGEST_PERSISTENT_CACHE_MAX_AGE seconds, use "
+                           "--refresh_cache after fixing metadata in Ingest.")
+    parser.add_option("--refresh_cache",
+                      help="Fetch every Ingest API response again instead of reading it from --cache_dir, the cache is "
+                           "updated for later runs.",
+                      action="store_true", default=False)
+    parser.add_option("-b", "--bulk_load",
+                      help="Load all the metadata of the --project_uuid in bulk before processing its manifests.",
+                      action="store_true", default=False)
+    parser.add_option("-g", "--ledger",
+                      help="Path of a ledger of the accessions of archived aliases that is updated by every run, aliases "
+                           "in it are not looked up in DSP again. Use one ledger per DSP environment and team.")
+    parser.add_option("-r", "--resume_submission_url",
+                      help="DSP Submission url of an earlier run that was interrupted while adding entities, only the "
+                           "entities missing from it are added. Use the same --output_dir to reuse its checkpoint.")
+    parser.add_option("-m", "--max_submission_size", type="int",
+                      help="Split the entities into DSP submissions of at most this many entities. Submissions that "
+                           "reference the entities of others are only created once those have been submitted.")
 
     (options, args) = parser.parse_args()
 
@@ -183,11 +239,15 @@ if __name__ == '__main__':
         exit_error("You must supply one of the following (1) a project UUID (2) a file with list of manifest IDs (3) a "
                    "submission url (4) a file of entities")
 
-    cli = ArchiveCLI(options.alias_prefix, options.output_dir, options.exclude_types, options.no_validation)
+    cli = ArchiveCLI(options.alias_prefix, options.output_dir, options.exclude_types, options.no_validation,
+                     options.workers, options.cache_dir, options.ledger, options.refresh_cache)
 
     if options.validation_errors and not options.submission_url:
         exit_error("You must supply param --submission_url")
 
+    if options.max_submission_size and options.resume_submission_url:
+        exit_error("You cannot supply both params --max_submission_size and --resume_submission_url")
+
     if options.validation_errors and options.submission_url:
         cli.generate_validation_error_report(options.submission_url)
         exit_success()
@@ -197,6 +257,8 @@ if __name__ == '__main__':
         exit_success()
 
     if options.project_uuid:
+        if options.bulk_load:
+            cli.load_metadata_index(options.project_uuid)
         cli.get_manifests_from_project(options.project_uuid)
         entity_map: ArchiveEntityMap = cli.build_map()
 
@@ -207,7 +269,9 @@ if __name__ == '__main__':
     elif options.load_path:
         entity_map: ArchiveEntityMap = cli.load_map(options.load_path)
 
-    if not options.no_validation:
-        cli.validate_submission(entity_map, options.submit)
+    if not options.no_validation and options.max_submission_size:
+        cli.validate_partitioned_submission(entity_map, options.submit, options.max_submission_size)
+    elif not options.no_validation:
+        cli.validate_submission(entity_map, options.submit, options.resume_submission_url)
 
     exit_success()
@@ -19,6 +19,16 @@ INGEST_API_PORT = '8080'
 INGEST_API_URL = INGEST_API_HOST + ':' + INGEST_API_PORT
 INGEST_API_URL = os.path.expandvars(os.environ.get('INGEST_API_URL', INGEST_API_URL))
 
+# ingest entity cache config, the byte budget and ttl (in seconds) are unbounded unless set
+INGEST_CACHE_MAX_ENTRIES = int(os.environ.get('INGEST_CACHE_MAX_ENTRIES', 20000))
+INGEST_CACHE_MAX_BYTES = os.environ.get('INGEST_CACHE_MAX_BYTES')
+INGEST_CACHE_MAX_BYTES = int(INGEST_CACHE_MAX_BYTES) if INGEST_CACHE_MAX_BYTES else None
+INGEST_CACHE_TTL = os.environ.get('INGEST_CACHE_TTL')
+INGEST_CACHE_TTL = int(INGEST_CACHE_TTL) if INGEST_CACHE_TTL else None
+
+# entries in the on-disk ingest cache (see --cache_dir) older than this many seconds are fetched again
+INGEST_PERSISTENT_CACHE_MAX_AGE = int(os.environ.get('INGEST_PERSISTENT_CACHE_MAX_AGE', 24 * 3600))
+
 AAP_API_URL = 'https://explore.api.aai.ebi.ac.uk/auth'
 AAP_API_URL = os.environ.get('AAP_API_URL', AAP_API_URL)
 AAP_API_USER = 'hca-ingest'
@@ -32,16 +42,57 @@ AAP_API_DOMAIN = os.environ.get('AAP_API_DOMAIN', AAP_API_DOMAIN)
 
 DSP_API_URL = os.environ.get('DSP_API_URL', os.environ.get('USI_API_URL', 'https://submission-test.ebi.ac.uk'))
 
+# paging config, pages of a collection are fetched concurrently by at most this many workers
+INGEST_API_PAGE_SIZE = int(os.environ.get('INGEST_API_PAGE_SIZE', 100))
+DSP_API_PAGE_SIZE = int(os.environ.get('DSP_API_PAGE_SIZE', 100))
+PAGE_FETCH_WORKERS = int(os.environ.get('PAGE_FETCH_WORKERS', 4))
+
 JSON_DIR = os.path.dirname(__file__) + '/tests/json/'
 ENCODING = 'utf-8'
 
-# polling config
-VALIDATION_POLLING_STEP = os.environ.get('VALIDATION_POLLING_STEP', 10)
-VALIDATION_POLLING_TIMEOUT = os.environ.get('VALIDATION_POLLING_TIMEOUT', 60)
-VALIDATION_POLL_FOREVER = os.environ.get('VALIDATION_POLL_FOREVER', True)
+# no. of entities created concurrently in a DSP submission
+DSP_SUBMISSION_WORKERS = int(os.environ.get('DSP_SUBMISSION_WORKERS', 1))
+DSP_VALIDATION_DETAIL_WORKERS = int(os.environ.get('DSP_VALIDATION_DETAIL_WORKERS', 8))
+
+# no. of DSP submissions of a stage that are created, validated and submitted concurrently (see --max_submission_size)
+DSP_PARALLEL_SUBMISSIONS = int(os.environ.get('DSP_PARALLEL_SUBMISSIONS', 4))
+
+# no. of concurrent current version lookups when checking which entities have already been archived
+DSP_CURRENT_VERSION_WORKERS = int(os.environ.get('DSP_CURRENT_VERSION_WORKERS', 8))
+
+# polling config, in seconds. Polls start at the step (scaled up for large submissions) and back off up to the max step
+# while there is no progress. The deadline, in hours, is the default of the timeout in seconds, polling only goes on
+# without one if polling forever
+VALIDATION_POLLING_STEP = float(os.environ.get('VALIDATION_POLLING_STEP', 10))
+VALIDATION_POLLING_MAX_STEP = float(os.environ.get('VALIDATION_POLLING_MAX_STEP', 300))
+VALIDATION_POLLING_DEADLINE = float(os.environ.get('VALIDATION_POLLING_DEADLINE', 12))
+VALIDATION_POLLING_TIMEOUT = float(os.environ.get('VALIDATION_POLLING_TIMEOUT', VALIDATION_POLLING_DEADLINE * 3600))
+VALIDATION_POLL_FOREVER = os.environ.get('VALIDATION_POLL_FOREVER', 'false').lower() == 'true'
+
+SUBMISSION_POLLING_STEP = float(os.environ.get('SUBMISSION_POLLING_STEP', 30))
+SUBMISSION_POLLING_MAX_STEP = float(os.environ.get('SUBMISSION_POLLING_MAX_STEP', 600))
+SUBMISSION_POLLING_DEADLINE = float(os.environ.get('SUBMISSION_POLLING_DEADLINE', 48))
+SUBMISSION_POLLING_TIMEOUT = float(os.environ.get('SUBMISSION_POLLING_TIMEOUT', SUBMISSION_POLLING_DEADLINE * 3600))
+SUBMISSION_POLL_FOREVER = os.environ.get('SUBMISSION_POLL_FOREVER', 'false').lower() == 'true'
+
+# the first polling interval grows by one step for every this many entities in the submission
+POLLING_ENTITIES_PER_STEP = int(os.environ.get('POLLING_ENTITIES_PER_STEP', 500))
+
+ONTOLOGY_API_URL = os.environ.get('ONTOLOGY_API_URL', 'https://ontology.staging.archive.data.humancellatlas.org')
+
+# ontology api connection config, the timeout is in seconds
+ONTOLOGY_API_POOL_SIZE = int(os.environ.get('ONTOLOGY_API_POOL_SIZE', 10))
+ONTOLOGY_API_RETRIES = int(os.environ.get('ONTOLOGY_API_RETRIES', 5))
+ONTOLOGY_API_TIMEOUT = float(os.environ.get('ONTOLOGY_API_TIMEOUT', 30))
+
+# ontology search cache config, the on-disk cache is only used if a path is set (or with the --cache_dir option)
+ONTOLOGY_CACHE_MAX_ENTRIES = int(os.environ.get('ONTOLOGY_CACHE_MAX_ENTRIES', 10000))
+ONTOLOGY_CACHE_PATH = os.environ.get('ONTOLOGY_CACHE_PATH')
+ONTOLOGY_CACHE_MAX_AGE = int(os.environ.get('ONTOLOGY_CACHE_MAX_AGE', 7 * 24 * 3600))
 
-SUBMISSION_POLLING_STEP = os.environ.get('SUBMISSION_POLLING_STEP', 30)
-SUBMISSION_POLLING_TIMEOUT = os.environ.get('SUBMISSION_POLLING_TIMEOUT', 120)
-SUBMISSION_POLL_FOREVER = os.environ.get('SUBMISSION_POLL_FOREVER', True)
+# local ontology index built with `python -m api.ontology_index`, if offline terms missing from it are not searched in OLS
+ONTOLOGY_INDEX_PATH = os.environ.get('ONTOLOGY_INDEX_PATH')
+ONTOLOGY_OFFLINE = os.environ.get('ONTOLOGY_OFFLINE', 'false').lower() == 'true'
 
-ONTOLOGY_API_URL = os.environ.get('ONTOLOGY_API_URL', 'https://ontology.staging.archive.data.humancellatlas.org')
\ No newline at end of file
+# no. of concurrent lookups when resolving the ontology terms of all entities before conversion
+ONTOLOGY_WORKERS = int(os.environ.get('ONTOLOGY_WORKERS', 8))
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from mock import MagicMock
+from mock import MagicMock, patch
 
 from archiver.archiver import Manifest, Biomaterial, ArchiverError
 
@@ -20,8 +20,8 @@ class ManifestTest(TestCase):
         ingest_api_mock.get_manifest_by_id = MagicMock(return_value={'fileBiomaterialMap': ['b1']})
         manifest = Manifest(ingest_api_mock, 'manifest_id')
         biomaterials = manifest.get_biomaterials()
-        Biomaterial.from_uuid = MagicMock(return_value='biomaterial')
-        self.assertEqual(list(biomaterials), ['biomaterial'])
+        with patch.object(Biomaterial, 'from_uuid', MagicMock(return_value='biomaterial')):
+            self.assertEqual(list(biomaterials), ['biomaterial'])
 
     def test_get_assay_process(self):
         ingest_api_mock = MagicMock(name='ingest_api')
@@ -1,12 +1,16 @@
 import copy
 import datetime
 import json
+import threading
+import time
 import unittest
 
+import requests
 from mock import MagicMock, patch
 
 import config
-from archiver.archiver import IngestArchiver, Manifest, ArchiveSubmission, Biomaterial
+from archiver.archiver import IngestArchiver, Manifest, ArchiveSubmission, Biomaterial, ArchiveEntity, \
+    ArchiveEntityMap, ArchiverError
 
 
 # TODO use mocks for integration tests
@@ -21,6 +25,7 @@ class TestIngestArchiver(unittest.TestCase):
         self.dsp_api = MagicMock()
         self.dsp_api.url = 'dsp_url'
         self.dsp_api.get_current_version = MagicMock(return_value=None)
+        self.dsp_api.get_current_versions = MagicMock(return_value={})
 
         with open(config.JSON_DIR + 'hca/biomaterials.json', encoding=config.ENCODING) as data_file:
             biomaterials = json.loads(data_file.read())
@@ -88,6 +93,179 @@ class TestIngestArchiver(unittest.TestCase):
         self.assertTrue(entities_by_type.get('sample'))
         self.assertTrue(entities_by_type.get('sequencingExperiment'))
 
+    @patch('api.ontology.OntologyAPI.expand_curie')
+    def test_convert_with_workers(self, expand_curie):
+        manifests = {}
+        for manifest_id in ['manifest_1', 'manifest_2', 'manifest_3']:
+            manifest = copy.deepcopy(self.base_manifest)
+            manifest['assay']['uuid']['uuid'] = f'assay_{manifest_id}'
+            manifest['manifest_id'] = manifest_id
+            manifests[manifest_id] = self._mock_manifest(manifest)
+
+        archiver = IngestArchiver(
+            ontology_api=self.ontology_api,
+            ingest_api=self.ingest_api,
+            dsp_api=self.dsp_api,
+            workers=3)
+        archiver.get_manifest = lambda manifest_id: manifests[manifest_id]
+        entity_map = archiver.convert(['url/manifest_1', 'url/manifest_2', 'url/manifest_3'])
+
+        sequencing_runs = list(entity_map.entities_dict_type.get('sequencingRun').values())
+        self.assertEqual([run.manifest_id for run in sequencing_runs], ['manifest_1', 'manifest_2', 'manifest_3'])
+
+    def test_convert_with_workers_names_failing_manifest(self):
+        def get_manifest(manifest_id):
+            if manifest_id == 'manifest_2':
+                raise requests.HTTPError('404 Not Found')
+            return self._mock_manifest(self.base_manifest)
+
+        archiver = IngestArchiver(
+            ontology_api=self.ontology_api,
+            ingest_api=self.ingest_api,
+            dsp_api=self.dsp_api,
+            workers=3)
+        archiver.get_manifest = get_manifest
+        with self.assertRaises(ArchiverError) as context:
+            archiver.convert(['url/manifest_1', 'url/manifest_2', 'url/manifest_3'])
+
+        self.assertIn('manifest_2', str(context.exception))
+
+    def test_convert_checks_current_versions_up_front(self):
+        archiver = IngestArchiver(
+            ontology_api=self.ontology_api,
+            ingest_api=self.ingest_api,
+            dsp_api=self.dsp_api)
+        project = ArchiveEntity()
+        project.archive_entity_type = 'project'
+        project.id = 'project_alias'
+        study = ArchiveEntity()
+        study.archive_entity_type = 'study'
+        study.id = 'study_alias'
+        self.dsp_api.get_current_versions = MagicMock(return_value={
+            ('project', 'project_alias'): {'accession': 'PRJ1', '_links': {'self': {'href': 'project_url'}}},
+            ('study', 'study_alias'): None
+        })
+        archiver.converter['study'].convert = MagicMock(return_value={})
+
+        archiver._convert([project, study])
+
+        self.dsp_api.get_current_versions.assert_called_once_with(
+            [('project', 'project_alias'), ('study', 'study_alias')], workers=config.DSP_CURRENT_VERSION_WORKERS)
+        self.dsp_api.get_current_version.assert_not_called()
+        self.assertEqual(project.accession, 'PRJ1')
+        self.assertTrue(project.errors)
+        self.assertFalse(study.errors)
+
+    def test_convert_skips_aliases_in_ledger(self):
+        ledger = MagicMock()
+        ledger.get = lambda alias: {'accession': 'PRJ1', 'submission_url': 'submission'} if alias == 'project' else None
+        archiver = IngestArchiver(
+            ontology_api=self.ontology_api,
+            ingest_api=self.ingest_api,
+            dsp_api=self.dsp_api,
+            ledger=ledger)
+        project = ArchiveEntity()
+        project.archive_entity_type = 'project'
+        project.id = 'project'
+        study = ArchiveEntity()
+        study.archive_entity_type = 'study'
+        study.id = 'study'
+        archiver.converter['study'].convert = MagicMock(return_value={})
+
+        archiver._convert([project, study])
+
+        self.dsp_api.get_current_versions.assert_called_once_with([('study', 'study')],
+                                                                  workers=config.DSP_CURRENT_VERSION_WORKERS)
+        self.assertEqual(project.accession, 'PRJ1')
+        self.assertEqual(project.errors[0]['details'], {'submission_url': 'submission'})
+        self.assertFalse(study.errors)
+
+    def test_archive_partitioned(self):
+        archiver = IngestArchiver(
+            ontology_api=self.ontology_api,
+            ingest_api=self.ingest_api,
+            dsp_api=self.dsp_api)
+        entity_map = ArchiveEntityMap()
+        for entity_type, alias in [('project', 'project'), ('sample', 'sample_1'), ('sample', 'sample_2')]:
+            entity = ArchiveEntity()
+            entity.archive_entity_type = entity_type
+            entity.id = alias
+            entity.conversion = {'alias': alias}
+            entity_map.add_entity(entity)
+        created = []
+
+        def archive_chunk(entities):
+            submission = MagicMock()
+            submission.converted_entities = entities
+            submission.is_completed = len(created) == 0
+            submission.accession_map = {entity.id: f'ACC_{entity.id}' for entity in entities}
+            submission.file_upload_info = []
+            created.append([entity.id for entity in entities])
+            return submission
+
+        archiver._archive_chunk = archive_chunk
+
+        partitioned_submission = archiver.archive_partitioned(entity_map, max_submission_size=1)
+
+        self.assertEqual(created, [['project'], ['sample_1'], ['sample_2']])
+        for submission in partitioned_submission.get_submissions():
+            submission.validate_and_submit.assert_called_once()
+        report = partitioned_submission.generate_report()
+        self.assertEqual(report['accessions'], {'project': 'ACC_project', 'sample_1': 'ACC_sample_1',
+                                                'sample_2': 'ACC_sample_2'})
+        self.assertEqual([submission['stage'] for submission in report['submissions']], [0, 1, 1])
+        self.assertFalse(report['completed'])
+
+    def test_archive_partitioned_stops_after_incomplete_stage(self):
+        archiver = IngestArchiver(
+            ontology_api=self.ontology_api,
+            ingest_api=self.ingest_api,
+            dsp_api=self.dsp_api)
+        entity_map = ArchiveEntityMap()
+        for entity_type in ['project', 'study']:
+            entity = ArchiveEntity()
+            entity.archive_entity_type = entity_type
+            entity.id = entity_type
+            entity.conversion = {'alias': entity_type}
+            entity_map.add_entity(entity)
+        submission = MagicMock()
+        submission.is_completed = False
+        archiver._archive_chunk = MagicMock(return_value=submission)
+
+        partitioned_submission = archiver.archive_partitioned(entity_map, max_submission_size=1)
+
+        archiver._archive_chunk.assert_called_once()
+        self.assertEqual(len(partitioned_submission.errors), 1)
+
+    @patch('api.ontology.OntologyAPI.expand_curie')
+    def test_convert_deduplicates_shared_entities(self, expand_curie):
+        manifests = {}
+        for manifest_id in ['manifest_1', 'manifest_2']:
+            manifest = copy.deepcopy(self.base_manifest)
+            manifest['assay']['uuid']['uuid'] = f'assay_{manifest_id}'
+            manifest['manifest_id'] = manifest_id
+            manifests[manifest_id] = self._mock_manifest(manifest)
+
+        archiver = IngestArchiver(
+            ontology_api=self.ontology_api,
+            ingest_api=self.ingest_api,
+            dsp_api=self.dsp_api,
+            exclude_types=['sequencingRun'])
+        archiver.converter['project'].convert = MagicMock(return_value={})
+        archiver.get_manifest = lambda manifest_id: manifests[manifest_id]
+        entity_map = archiver.convert(['manifest_1', 'manifest_2'])
+
+        project = list(entity_map.entities_dict_type.get('project').values())[0]
+        self.assertEqual(project.manifest_ids, ['manifest_1', 'manifest_2'])
+        archiver.converter['project'].convert.assert_called_once()
+        project_version_checks = [call for call in self.dsp_api.get_current_version.call_args_list
+                                  if call[0][0] == 'project']
+        self.assertEqual(len(project_version_checks), 1)
+        self.assertEqual(len(entity_map.entities_dict_type.get('sequencingExperiment')), 2)
+
+        report = entity_map.generate_report()
+        self.assertEqual(report['entities'][project.id]['manifest_ids'], ['manifest_1', 'manifest_2'])
+
     @unittest.skip("This is an Integration Test")
     def test_archive(self):
         mock_manifest = self._mock_manifest(self.base_manifest)
@@ -203,3 +381,337 @@ class TestIngestArchiver(unittest.TestCase):
         self.assertTrue(archive_submission.is_completed)
         self.assertTrue(archive_submission.errors)
         self.assertFalse(archive_submission.processing_result)
+
+
+class TestArchiveSubmission(unittest.TestCase):
+    def setUp(self):
+        self.dsp_api = MagicMock()
+        self.dsp_api.page_size = 20
+        self.dsp_api.get_entity_url = lambda entity_type: f'{entity_type}s'
+        self.dsp_api.get_contents = MagicMock(return_value={'_links': {
+            f'{entity_type}s:create': {'href': f'create_{entity_type}'}
+            for entity_type in ['project', 'study', 'sample', 'sequencingExperiment', 'sequencingRun']
+        }})
+        self.archive_submission = ArchiveSubmission(dsp_api=self.dsp_api)
+        self.archive_submission.submission = {'_links': {'contents': {'href': 'contents'},
+                                                             'self': {'href': 'submission'}}}
+
+    @staticmethod
+    def _archive_entity(entity_type, alias, derived_from=None):
+        entity = ArchiveEntity()
+        entity.archive_entity_type = entity_type
+        entity.id = alias
+        entity.conversion = {'alias': alias}
+        if derived_from:
+            entity.conversion['sampleRelationships'] = [{'alias': derived_from, 'relationshipNature': 'derived from'}]
+        return entity
+
+    def test_get_creation_levels(self):
+        run = self._archive_entity('sequencingRun', 'run')
+        cell_suspension = self._archive_entity('sample', 'cell_suspension', derived_from='specimen')
+        specimen = self._archive_entity('sample', 'specimen', derived_from='donor')
+        donor = self._archive_entity('sample', 'donor')
+        project = self._archive_entity('project', 'project')
+
+        levels = ArchiveSubmission.get_creation_levels([run, cell_suspension, specimen, donor, project])
+
+        self.assertEqual([[entity.id for entity in level] for level in levels],
+                         [['project'], ['donor'], ['specimen'], ['cell_suspension'], ['run']])
+
+    def test_add_entities_concurrently(self):
+        created_urls = []
+
+        def create_entity(url, content):
+            created_urls.append(url)
+            return {'alias': content['alias']}
+
+        self.dsp_api.create_entity = create_entity
+        entities = [self._archive_entity('sample', f'sample_{index}') for index in range(5)]
+        entities.insert(0, self._archive_entity('sequencingExperiment', 'experiment'))
+
+        self.archive_submission.add_entities(entities, workers=3)
+
+        self.assertEqual(created_urls[-1], 'create_sequencingExperiment')
+        self.assertEqual([entity.dsp_json for entity in entities], [{'alias': entity.id} for entity in entities])
+
+    def test_add_entities_resumes_and_checkpoints(self):
+        created_aliases = []
+
+        def create_entity(url, content):
+            created_aliases.append(content['alias'])
+            return {'alias': content['alias'], '_links': {'self': {'href': f"entity/{content['alias']}"}}}
+
+        self.dsp_api.create_entity = create_entity
+        self.dsp_api.get_submitted_entities = MagicMock(return_value={
+            'sample_0': {'alias': 'sample_0', '_links': {'self': {'href': 'entity/sample_0'}}}
+        })
+        checkpoint = MagicMock()
+        checkpoint.load = MagicMock(return_value={
+            'sample_1': {'alias': 'sample_1', '_links': {'self': {'href': 'entity/sample_1'}}}
+        })
+        entities = [self._archive_entity('sample', f'sample_{index}') for index in range(3)]
+
+        self.archive_submission.add_entities(entities, checkpoint=checkpoint, resume=True)
+
+        self.assertEqual(created_aliases, ['sample_2'])
+        checkpoint.record.assert_called_once_with('sample_2', 'entity/sample_2')
+        self.assertEqual([entity.dsp_json['_links']['self']['href'] for entity in entities],
+                         ['entity/sample_0', 'entity/sample_1', 'entity/sample_2'])
+
+    def test_add_entities_records_failures(self):
+        response = MagicMock()
+        response.text = 'invalid sample'
+
+        def create_entity(url, content):
+            if content['alias'] == 'bad_sample':
+                raise requests.HTTPError('400 Client Error', response=response)
+            return {'alias': content['alias']}
+
+        self.dsp_api.create_entity = create_entity
+        good_sample = self._archive_entity('sample', 'good_sample')
+        bad_sample = self._archive_entity('sample', 'bad_sample')
+
+        self.archive_submission.add_entities([good_sample, bad_sample], workers=2)
+
+        self.assertTrue(good_sample.dsp_json)
+        self.assertFalse(good_sample.errors)
+        self.assertEqual(bad_sample.errors[0]['details'], {'response': 'invalid sample'})
+        self.assertEqual(len(self.archive_submission.errors), 1)
+
+    def test_add_entities_skips_entities_referencing_failed_ones(self):
+        created_aliases = []
+
+        def create_entity(url, content):
+            if content['alias'] == 'donor':
+                raise requests.HTTPError('400 Client Error')
+            created_aliases.append(content['alias'])
+            return {'alias': content['alias']}
+
+        self.dsp_api.create_entity = create_entity
+        donor = self._archive_entity('sample', 'donor')
+        specimen = self._archive_entity('sample', 'specimen', derived_from='donor')
+        other_donor = self._archive_entity('sample', 'other_donor')
+        experiment = self._archive_entity('sequencingExperiment', 'experiment')
+        experiment.conversion['sampleUses'] = [{'sampleRef': {'alias': 'specimen'}}]
+        run = self._archive_entity('sequencingRun', 'run')
+        run.conversion['assayRefs'] = [{'alias': 'experiment'}]
+
+        self.archive_submission.add_entities([donor, specimen, other_donor, experiment, run], workers=2)
+
+        self.assertEqual(created_aliases, ['other_donor'])
+        for entity in [specimen, experiment, run]:
+            self.assertIsNone(entity.dsp_json)
+            self.assertIn('a referenced entity was not created', entity.errors[0]['error_message'])
+        self.assertEqual(specimen.errors[0]['details'], {'references': ['donor']})
+        self.assertEqual(len(self.archive_submission.errors), 4)
+
+    def test_partition(self):
+        project = self._archive_entity('project', 'project')
+        study = self._archive_entity('study', 'study')
+        donors = [self._archive_entity('sample', f'donor_{index}') for index in range(5)]
+        specimen = self._archive_entity('sample', 'specimen', derived_from='donor_0')
+        experiment = self._archive_entity('sequencingExperiment', 'experiment')
+
+        stages = ArchiveSubmission.partition([experiment, specimen] + donors + [study, project], max_size=3)
+
+        self.assertEqual([[[entity.id for entity in chunk] for chunk in stage] for stage in stages], [
+            [['project', 'study']],
+            [['donor_0', 'donor_1', 'donor_2'], ['donor_3', 'donor_4']],
+            [['specimen', 'experiment']]
+        ])
+
+    def _mock_validation_results(self, statuses):
+        validation_results = []
+        details = {}
+        for index, status in enumerate(statuses):
+            details_url = f'validation_result_{index}'
+            validation_results.append({
+                'validationStatus': status,
+                '_links': {'validationResult': {'href': details_url + '{?projection}'}}
+            })
+            details[details_url] = {
+                'errorMessages': {'Biosamples': ['invalid']} if index == 0 else {},
+                '_links': {'submittable': {'href': f'submittable_{index}'}}
+            }
+        self.archive_submission.submission['_links']['validationResults'] = {'href': 'validation_results'}
+        self.dsp_api.get_validation_results = MagicMock(side_effect=lambda url: iter(validation_results))
+        self.dsp_api.get_validation_result_details = MagicMock(side_effect=lambda url: details[url])
+
+    @patch('config.VALIDATION_POLL_FOREVER', False)
+    def test_validate_fetches_validation_results_once_per_poll(self):
+        self._mock_validation_results(['Complete', 'Complete', 'Complete'])
+
+        self.archive_submission.validate()
+
+        self.assertEqual(self.dsp_api.get_validation_results.call_count, 1)
+        self.assertEqual(self.dsp_api.get_validation_result_details.call_count, 3)
+        self.assertEqual(self.archive_submission.errors[0]['details']['dsp_validation_errors'],
+                         [{'Biosamples': ['invalid']}])
+        self.assertEqual(len(self.archive_submission.validation_result), 3)
+
+    def test_get_validation_error_report(self):
+        self._mock_validation_results(['Complete', 'Complete'])
+
+        report = self.archive_submission.get_validation_error_report()
+
+        self.assertEqual(report, {'submittable_0': [{'Biosamples': ['invalid']}]})
+
+    def test_get_all_validation_result_details_keeps_result_order(self):
+        self._mock_validation_results(['Complete', 'Pending', 'Complete', 'Complete'])
+        get_details = self.dsp_api.get_validation_result_details.side_effect
+
+        def slow_first_details(url):
+            if url == 'validation_result_0':
+                time.sleep(.05)
+            return get_details(url)
+
+        self.dsp_api.get_validation_result_details.side_effect = slow_first_details
+
+        details = self.archive_submission.get_all_validation_result_details()
+
+        self.assertEqual([detail['_links']['submittable']['href'] for detail in details],
+                         ['submittable_0', 'submittable_2', 'submittable_3'])
+
+    def test_validation_result_details_are_streamed_with_bounded_requests(self):
+        self._mock_validation_results(['Complete'] * 20)
+        get_details = self.dsp_api.get_validation_result_details.side_effect
+        in_flight = []
+        max_in_flight = []
+        lock = threading.Lock()
+
+        def tracked_details(url):
+            with lock:
+                in_flight.append(url)
+                max_in_flight.append(len(in_flight))
+            time.sleep(.005)
+            with lock:
+                in_flight.remove(url)
+            return get_details(url)
+
+        self.dsp_api.get_validation_result_details.side_effect = tracked_details
+        snapshot = self.archive_submission.take_validation_snapshot()
+        snapshot.workers = 2
+
+        indices = sorted(index for _, index in snapshot.iter_details())
+
+        self.assertEqual(indices, list(range(20)))
+        self.assertLessEqual(max(max_in_flight), 2)
+
+    @patch('config.VALIDATION_POLL_FOREVER', False)
+    def test_validate_records_polling_stats(self):
+        self._mock_validation_results(['Complete'])
+
+        self.archive_submission.validate()
+        report = self.archive_submission.generate_report()
+
+        self.assertEqual(report['polling']['validation']['poll_count'], 1)
+        self.assertIsNotNone(report['time_to_validation'])
+
+    def test_is_validated_only_requeries_pending_results(self):
+        self._mock_validation_results(['Complete', 'Pending', 'Complete'])
+        validation_results = list(self.dsp_api.get_validation_results('validation_results'))
+        for index, validation_result in enumerate(validation_results):
+            validation_result['_links']['self'] = {'href': f'result_{index}{{?projection}}'}
+        self.dsp_api.get_validation_results = MagicMock(return_value=validation_results)
+        completed_result = copy.deepcopy(validation_results[1])
+        completed_result['validationStatus'] = 'Complete'
+        self.dsp_api.get_validation_result = MagicMock(return_value=completed_result)
+
+        self.assertFalse(self.archive_submission.is_validated())
+        self.assertTrue(self.archive_submission.is_validated())
+
+        self.assertEqual(self.dsp_api.get_validation_results.call_count, 1)
+        self.dsp_api.get_validation_result.assert_called_once_with('result_1')
+        self.assertTrue(self.archive_submission.validation_snapshot.incremental)
+
+    def test_is_validated_pages_all_results_when_many_are_pending(self):
+        self._mock_validation_results(['Pending'] * 3)
+        snapshot = self.archive_submission.take_validation_snapshot()
+        for index, validation_result in enumerate(snapshot.validation_results):
+            validation_result['_links']['self'] = {'href': f'result_{index}'}
+        snapshot.workers = 2
+
+        self.archive_submission.is_validated()
+
+        self.assertEqual(self.dsp_api.get_validation_results.call_count, 2)
+        self.assertFalse(self.archive_submission.validation_snapshot.incremental)
+
+    def test_process_result_records_accessions_in_ledger(self):
+        ledger = MagicMock()
+        self.archive_submission.ledger = ledger
+        self.dsp_api.get_processing_results = MagicMock(return_value=[
+            {'status': 'Completed', 'alias': 'sample_1', 'accession': 'SAMEA1'},
+            {'status': 'Error', 'alias': 'sample_2'}
+        ])
+
+        self.archive_submission.process_result()
+
+        ledger.record.assert_called_once_with({'sample_1': 'SAMEA1'}, submission_url='submission')
+
+    def test_is_processing_complete_from_summary(self):
+        self.archive_submission.submission['_links']['processingStatusSummary'] = {'href': 'summary'}
+        self.dsp_api.get_processing_summary = MagicMock(side_effect=[{'Submitted': 2, 'Completed': 3},
+                                                                     {'Completed': 4, 'Error': 1}])
+
+        self.assertFalse(self.archive_submission.is_processing_complete())
+        self.assertEqual(self.archive_submission.pending_processing_count, 2)
+        self.assertTrue(self.archive_submission.is_processing_complete())
+        self.dsp_api.get_processing_results.assert_not_called()
+
+    def test_is_processing_complete_from_results_when_summary_is_empty(self):
+        self.archive_submission.submission['_links']['processingStatusSummary'] = {'href': 'summary'}
+        self.dsp_api.get_processing_summary = MagicMock(return_value={})
+        self.dsp_api.get_processing_results = MagicMock(return_value=[])
+
+        self.assertTrue(self.archive_submission.is_processing_complete())
+        self.assertEqual(self.archive_submission.pending_processing_count, 0)
+
+    def test_is_processing_complete_without_summary(self):
+        self.dsp_api.get_processing_results = MagicMock(return_value=[{'status': 'Completed'}, {'status': 'Submitted'}])
+
+        self.assertFalse(self.archive_submission.is_processing_complete())
+        self.assertEqual(self.archive_submission.pending_processing_count, 1)
+
+    @patch('config.VALIDATION_POLL_FOREVER', False)
+    def test_validate_from_blockers_summary(self):
+        self._mock_validation_results(['Complete'])
+        self.archive_submission.submission['_links']['submissionBlockersSummary'] = {'href': 'summary'}
+        self.dsp_api.get_submission_blockers_summary = MagicMock(
+            return_value={'notValidatedCount': 0, 'hasAnyValidationError': False})
+
+        self.archive_submission.validate()
+
+        self.dsp_api.get_validation_results.assert_not_called()
+        self.assertFalse(self.archive_submission.errors)
+
+    @patch('config.VALIDATION_POLL_FOREVER', False)
+    def test_validate_from_blockers_summary_gets_error_details(self):
+        self._mock_validation_results(['Complete', 'Complete'])
+        self.archive_submission.submission['_links']['submissionBlockersSummary'] = {'href': 'summary'}
+        self.dsp_api.get_submission_blockers_summary = MagicMock(
+            return_value={'notValidatedCount': 0, 'hasAnyValidationError': True})
+
+        self.archive_submission.validate()
+
+        self.assertEqual(self.dsp_api.get_validation_results.call_count, 1)
+        self.assertEqual(self.archive_submission.errors[0]['details']['dsp_validation_errors'],
+                         [{'Biosamples': ['invalid']}])
+
+    def test_is_ready_to_submit_skips_status_check_when_summary_reports_errors(self):
+        self._mock_validation_results(['Complete', 'Complete'])
+        self.archive_submission.submission['_links']['submissionBlockersSummary'] = {'href': 'summary'}
+        self.dsp_api.get_submission_blockers_summary = MagicMock(
+            return_value={'notValidatedCount': 0, 'hasAnyValidationError': True})
+        self.archive_submission.generate_report = MagicMock(return_value={})
+
+        self.assertFalse(self.archive_submission.is_ready_to_submit())
+
+        self.dsp_api.get_submission_status.assert_not_called()
+
+    def test_is_validated_from_blockers_summary_counts_pending(self):
+        self.archive_submission.submission['_links']['submissionBlockersSummary'] = {'href': 'summary'}
+        self.dsp_api.get_submission_blockers_summary = MagicMock(return_value={'notValidatedCount': 4})
+
+        self.assertFalse(self.archive_submission.is_validated())
+        self.assertEqual(self.archive_submission.get_pending_validation_count(), 4)
+        self.dsp_api.get_validation_results.assert_not_called()
@@ -0,0 +1,24 @@
+from unittest import TestCase
+
+from utils.bloom import BloomFilter
+
+
+class TestBloomFilter(TestCase):
+    def test_added_keys_are_always_found(self):
+        bloom_filter = BloomFilter(capacity=1000)
+        keys = [f'HCA_sample_{index}' for index in range(1000)]
+        for key in keys:
+            bloom_filter.add(key)
+
+        self.assertTrue(all(key in bloom_filter for key in keys))
+        self.assertEqual(len(bloom_filter), 1000)
+        self.assertTrue(bloom_filter.is_full())
+
+    def test_false_positive_rate(self):
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        for index in range(1000):
+            bloom_filter.add(f'HCA_sample_{index}')
+
+        false_positives = len([index for index in range(10000) if f'HCA_project_{index}' in bloom_filter])
+
+        self.assertLess(false_positives, 300)
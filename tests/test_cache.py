@@ -0,0 +1,104 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from utils.cache import LRUCache, MISSING, SQLiteCache
+
+
+class TestLRUCache(TestCase):
+    def test_get_missing_key_returns_missing(self):
+        cache = LRUCache()
+        self.assertIs(cache.get('key'), MISSING)
+        self.assertEqual(cache.misses, 1)
+
+    def test_set_and_get(self):
+        cache = LRUCache()
+        cache.set('key', {'uuid': 'u1'})
+        self.assertEqual(cache.get('key'), {'uuid': 'u1'})
+        self.assertEqual(cache.hits, 1)
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = LRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertIs(cache.get('b'), MISSING)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_evicts_when_over_byte_budget(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set('a', 1, size=6)
+        cache.set('b', 2, size=6)
+
+        self.assertIs(cache.get('a'), MISSING)
+        self.assertEqual(cache.size_bytes, 6)
+
+    def test_expired_entry_is_missing(self):
+        cache = LRUCache(ttl=10)
+        with patch('utils.cache.time.monotonic', MagicMock(return_value=100)):
+            cache.set('a', 1)
+        with patch('utils.cache.time.monotonic', MagicMock(return_value=111)):
+            self.assertIs(cache.get('a'), MISSING)
+        self.assertEqual(len(cache), 0)
+
+    def test_caches_falsy_values(self):
+        cache = LRUCache()
+        cache.set('a', None)
+        self.assertIsNone(cache.get('a'))
+
+    def test_does_not_cache_falsy_values_when_negative_caching_disabled(self):
+        cache = LRUCache(cache_negative=False)
+        cache.set('a', {})
+        self.assertIs(cache.get('a'), MISSING)
+
+
+class TestSQLiteCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_values_persist_across_instances(self):
+        cache = SQLiteCache(self.path)
+        cache.set('url', {'uuid': {'uuid': 'u1'}})
+        cache.close()
+
+        cache = SQLiteCache(self.path)
+        self.assertEqual(cache.get('url'), {'uuid': {'uuid': 'u1'}})
+        cache.close()
+
+    def test_stale_entry_is_missing(self):
+        cache = SQLiteCache(self.path, max_age=60)
+        with patch('utils.cache.time.time', MagicMock(return_value=1000)):
+            cache.set('url', {'uuid': 'u1'})
+        with patch('utils.cache.time.time', MagicMock(return_value=1061)):
+            self.assertIs(cache.get('url'), MISSING)
+        cache.close()
+
+    def test_set_many(self):
+        cache = SQLiteCache(self.path)
+        cache.set_many([('a', {'uuid': 'a'}), ('b', None)])
+
+        self.assertEqual(cache.get('a'), {'uuid': 'a'})
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache._connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        cache.close()
+
+    def test_refresh_ignores_entries_of_earlier_runs(self):
+        with patch('utils.cache.time.time', MagicMock(return_value=1000)):
+            cache = SQLiteCache(self.path)
+            cache.set('url', {'uuid': 'old'})
+            cache.close()
+        with patch('utils.cache.time.time', MagicMock(return_value=1010)):
+            cache = SQLiteCache(self.path, refresh=True)
+            self.assertIs(cache.get('url'), MISSING)
+            cache.set('url', {'uuid': 'new'})
+            self.assertEqual(cache.get('url'), {'uuid': 'new'})
+            cache.close()
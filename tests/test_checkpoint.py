@@ -0,0 +1,37 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from archiver.checkpoint import AddEntitiesCheckpoint
+
+
+class TestAddEntitiesCheckpoint(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'output', 'ADD_ENTITIES_submission.jsonl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_missing_checkpoint(self):
+        self.assertEqual(AddEntitiesCheckpoint(self.path).load(), {})
+
+    def test_load_recorded_entities(self):
+        checkpoint = AddEntitiesCheckpoint(self.path)
+        checkpoint.record('sample_1', 'samples/1')
+        checkpoint.record('sample_2', 'samples/2')
+        checkpoint.close()
+
+        entities = AddEntitiesCheckpoint(self.path).load()
+
+        self.assertEqual(entities['sample_1'], {'alias': 'sample_1', '_links': {'self': {'href': 'samples/1'}}})
+        self.assertEqual(len(entities), 2)
+
+    def test_load_ignores_truncated_line(self):
+        checkpoint = AddEntitiesCheckpoint(self.path)
+        checkpoint.record('sample_1', 'samples/1')
+        checkpoint.close()
+        with open(self.path, 'a') as checkpoint_file:
+            checkpoint_file.write('{"alias": "sample_2", "entity_')
+
+        self.assertEqual(list(AddEntitiesCheckpoint(self.path).load().keys()), ['sample_1'])
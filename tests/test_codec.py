@@ -0,0 +1,24 @@
+import unittest
+
+from mock import MagicMock, patch
+
+from api import codec
+
+
+class TestCodec(unittest.TestCase):
+    def test_round_trip(self):
+        data = {'alias': 'sample_1', 'attributes': {'HCA Biomaterial UUID': [{'value': 'u1'}]}}
+        self.assertEqual(codec.loads(codec.dumps(data)), data)
+
+    def test_dumps_returns_bytes(self):
+        self.assertIsInstance(codec.dumps({}), bytes)
+
+    @patch('api.codec.orjson', None)
+    def test_stdlib_fallback(self):
+        self.assertEqual(codec.dumps({'a': 1}), b'{"a": 1}')
+        self.assertEqual(codec.loads(b'{"a": 1}'), {'a': 1})
+
+    def test_parse_response(self):
+        response = MagicMock()
+        response.content = b'{"_embedded": {"samples": []}}'
+        self.assertEqual(codec.parse_response(response), {'_embedded': {'samples': []}})
@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from mock import MagicMock
+
+from utils.concurrency import get_worker_count, map_bounded, map_distinct
+
+
+class TestConcurrency(TestCase):
+    def test_get_worker_count(self):
+        self.assertEqual(get_worker_count(None), 1)
+        self.assertEqual(get_worker_count(0), 1)
+        self.assertEqual(get_worker_count(4), 4)
+
+    def test_map_distinct_calls_each_key_once(self):
+        fn = MagicMock(side_effect=lambda key: key.upper())
+
+        results, failures = map_distinct(fn, ['b', 'a', 'b'], workers=2)
+
+        self.assertEqual(results, {'a': 'A', 'b': 'B'})
+        self.assertEqual(failures, {})
+        self.assertEqual(fn.call_count, 2)
+
+    def test_map_distinct_reports_failures_separately_from_none_results(self):
+        def fn(key):
+            if key == 'fails':
+                raise ValueError(key)
+            return None
+
+        results, failures = map_distinct(fn, ['none', 'fails'], workers=2, errors=(ValueError,))
+
+        self.assertEqual(results, {'none': None})
+        self.assertEqual(list(failures), ['fails'])
+        self.assertIsInstance(failures['fails'], ValueError)
+
+    def test_map_distinct_raises_unexpected_errors(self):
+        fn = MagicMock(side_effect=KeyError('key'))
+
+        with self.assertRaises(KeyError):
+            map_distinct(fn, ['key'], errors=(ValueError,))
+
+    def test_map_bounded_keeps_order(self):
+        results = list(map_bounded(lambda item: item * 2, range(10), workers=3))
+
+        self.assertEqual(results, [(index, index * 2) for index in range(10)])
+
+    def test_map_bounded_unordered_yields_every_result(self):
+        results = list(map_bounded(lambda item: item * 2, range(10), workers=3, ordered=False))
+
+        self.assertEqual(sorted(results), [(index, index * 2) for index in range(10)])
+
+    def test_map_bounded_limits_calls_in_flight(self):
+        submitted = []
+
+        def items():
+            for index in range(20):
+                submitted.append(index)
+                yield index
+
+        results = map_bounded(lambda item: item, items(), workers=2)
+        next(results)
+
+        self.assertLessEqual(len(submitted), 4)
+        self.assertEqual(len(list(results)), 19)
@@ -247,3 +247,45 @@ class TestConverter(unittest.TestCase):
 
         # then:
         self.assertEqual(expected_json, actual_json)
+
+    def test_get_sample_ontology_terms(self):
+        converter = SampleConverter(ontology_api=self.ontology_api)
+        converter.ingest_api = self.ingest_api
+        biomaterial = self.hca_data.get('biomaterial')
+
+        terms = converter.get_ontology_terms({'biomaterial': biomaterial})
+
+        converter.convert({'biomaterial': biomaterial})
+        expanded_terms = {call[0][0] for call in self.ontology_api.expand_curie.call_args_list}
+        self.assertEqual(terms, expanded_terms)
+
+    def test_get_sequencing_experiment_ontology_terms(self):
+        converter = SequencingExperimentConverter(ontology_api=self.ontology_api)
+
+        terms = converter.get_ontology_terms(self.hca_data)
+
+        self.assertEqual(terms, {'Smart-seq2', 'full length single cell RNA sequencing'})
+
+    def test_convert_reads_resolved_ontology_terms(self):
+        converter = SampleConverter(ontology_api=self.ontology_api)
+        converter.ingest_api = self.ingest_api
+        biomaterial = self.hca_data.get('biomaterial')
+        terms = converter.get_ontology_terms({'biomaterial': biomaterial})
+        converter.ontology_terms = {term: f'http://iri/{term}' for term in terms}
+        self.ontology_api.expand_curie.reset_mock()
+
+        converter.convert({'biomaterial': biomaterial})
+
+        self.ontology_api.expand_curie.assert_not_called()
+
+    def test_sequencing_experiment_reads_resolved_ontology_terms(self):
+        converter = SequencingExperimentConverter(ontology_api=self.ontology_api)
+        converter.ontology_terms = {term: f'http://iri/{term}' for term in converter.get_ontology_terms(self.hca_data)}
+        self.ontology_api.expand_curie.reset_mock()
+
+        converted = converter.convert(self.hca_data)
+
+        self.ontology_api.expand_curie.assert_not_called()
+        self.assertEqual(
+            converted['attributes']['Library Preparation Protocol - Library Construction Method'][0]['terms'],
+            [{'url': 'http://iri/Smart-seq2'}])
@@ -3,6 +3,8 @@ import os
 import json
 import config
 
+import requests
+
 from mock import MagicMock
 from api.dsp import DataSubmissionPortal, AAPTokenClient
 from archiver.converter import SampleConverter
@@ -33,6 +35,27 @@ class TestDataSubmissionPortal(unittest.TestCase):
     def tearDown(self):
         self.dsp_api.session.close()
 
+    def test_get_current_versions(self):
+        current_versions = {'alias_1': {'accession': 'SAMEA1'}, 'alias_2': None}
+
+        def get_current_version(entity_type, alias):
+            if alias == 'alias_3':
+                raise requests.HTTPError('500 Server Error')
+            return current_versions[alias]
+
+        self.dsp_api.get_current_version = MagicMock(side_effect=get_current_version)
+
+        results = self.dsp_api.get_current_versions([('sample', 'alias_1'), ('sample', 'alias_2'), ('sample', 'alias_1'),
+                                                     ('sample', 'alias_3')], workers=2)
+
+        self.assertEqual(results, {('sample', 'alias_1'): {'accession': 'SAMEA1'}, ('sample', 'alias_2'): None})
+        self.assertEqual(self.dsp_api.get_current_version.call_count, 3)
+
+    def test_get_link_url_strips_projection_template(self):
+        resource = {'_links': {'self': {'href': 'http://dsp/submissions/1{?projection}'}}}
+
+        self.assertEqual(DataSubmissionPortal.get_link_url(resource, 'self'), 'http://dsp/submissions/1')
+
     def test_get_token_given_valid_credentials_return_token(self):
         aap_user = os.environ.get('AAP_API_USER', '')
         aap_password = os.environ.get('AAP_API_PASSWORD', '')
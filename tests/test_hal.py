@@ -0,0 +1,56 @@
+import unittest
+from urllib.parse import urlsplit, parse_qs
+
+from api import hal
+
+
+def _query(url):
+    return {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+
+
+class TestHal(unittest.TestCase):
+    def setUp(self):
+        self.requested_urls = []
+
+    def _get_page(self, url):
+        self.requested_urls.append(url)
+        query = _query(url)
+        number = int(query.get('page', 0))
+        size = int(query.get('size', 2))
+        page = {
+            '_embedded': {'items': [f'item_{number}_{index}' for index in range(size)]},
+            '_links': {},
+            'page': {'size': size, 'number': number, 'totalPages': 5}
+        }
+        if number < 4:
+            page['_links']['next'] = {'href': hal.set_query_params(url, page=number + 1)}
+        return page
+
+    def test_set_query_params_keeps_existing_params(self):
+        url = hal.set_query_params('http://api/search?projectUuid=p1&bundleType=PRIMARY', size=100)
+        self.assertEqual(_query(url), {'projectUuid': 'p1', 'bundleType': 'PRIMARY', 'size': '100'})
+
+    def test_get_all_follows_next_links(self):
+        entities = list(hal.get_all(self._get_page, 'http://api/items', 'items'))
+        self.assertEqual(len(entities), 10)
+        self.assertEqual(entities[0], 'item_0_0')
+        self.assertEqual(entities[-1], 'item_4_1')
+
+    def test_get_all_requests_page_size(self):
+        entities = list(hal.get_all(self._get_page, 'http://api/items', 'items', page_size=3))
+        self.assertEqual(len(entities), 15)
+        self.assertEqual(_query(self.requested_urls[0])['size'], '3')
+
+    def test_get_all_fetches_pages_concurrently_in_order(self):
+        entities = list(hal.get_all(self._get_page, 'http://api/items', 'items', workers=3))
+        expected = [f'item_{number}_{index}' for number in range(5) for index in range(2)]
+        self.assertEqual(entities, expected)
+        self.assertEqual(len(self.requested_urls), 5)
+
+    def test_get_all_without_embedded_entities(self):
+        entities = list(hal.get_all(lambda url: {'_links': {}}, 'http://api/items', 'items'))
+        self.assertEqual(entities, [])
+
+    def test_get_all_of_any_embedded_list(self):
+        entities = list(hal.get_all(self._get_page, 'http://api/items', None))
+        self.assertEqual(len(entities), 10)
@@ -0,0 +1,120 @@
+import unittest
+
+from mock import MagicMock, patch
+
+from api.ingest import IngestAPI, SchemaRegistry
+from utils.cache import MISSING
+
+
+class TestSchemaRegistry(unittest.TestCase):
+    def test_get_schema_name_from_type_url(self):
+        get_schema = MagicMock()
+        registry = SchemaRegistry(get_schema)
+
+        schema_name = registry.get_schema_name(
+            'https://schema.humancellatlas.org/type/protocol/sequencing/9.0.3/sequencing_protocol')
+
+        self.assertEqual(schema_name, 'sequencing_protocol')
+        get_schema.assert_not_called()
+
+    def test_get_schema_name_fetches_unrecognised_url_once(self):
+        get_schema = MagicMock(return_value={'name': 'links'})
+        registry = SchemaRegistry(get_schema)
+
+        registry.get_schema_name('http://schema.staging.data.humancellatlas.org/system/1.1.3/links')
+        schema_name = registry.get_schema_name('http://schema.staging.data.humancellatlas.org/system/1.1.3/links')
+
+        self.assertEqual(schema_name, 'links')
+        get_schema.assert_called_once()
+
+
+class TestIngestAPI(unittest.TestCase):
+    def setUp(self):
+        self.ingest_api = IngestAPI(url='http://ingest')
+        self.ingest_api.session = MagicMock()
+
+    def test_get_concrete_entity_type(self):
+        entity = {
+            'content': {
+                'describedBy': 'http://schema.integration.data.humancellatlas.org/type/biomaterial/10.1.1/donor_organism'
+            }
+        }
+
+        concrete_type = self.ingest_api.get_concrete_entity_type(entity)
+
+        self.assertEqual(concrete_type, 'donor_organism')
+        self.ingest_api.session.get.assert_not_called()
+
+    def test_get_related_entity_is_cached(self):
+        entity = {'_links': {'protocols': {'href': 'http://ingest/processes/p1/protocols'}}}
+        protocol = {
+            'uuid': {'uuid': 'protocol-uuid'},
+            '_links': {'self': {'href': 'http://ingest/protocols/protocol-id'}}
+        }
+        self.ingest_api._get_all = MagicMock(return_value=iter([protocol]))
+
+        self.ingest_api.get_related_entity(entity, 'protocols', 'protocols')
+        related_entities = self.ingest_api.get_related_entity(entity, 'protocols', 'protocols')
+
+        self.assertEqual(related_entities, [protocol])
+        self.ingest_api._get_all.assert_called_once()
+
+    def test_get_related_entity_caches_related_entities(self):
+        entity = {'_links': {'protocols': {'href': 'http://ingest/processes/p1/protocols'}}}
+        protocol = {
+            'uuid': {'uuid': 'protocol-uuid'},
+            '_links': {'self': {'href': 'http://ingest/protocols/protocol-id'}}
+        }
+        self.ingest_api._get_all = MagicMock(return_value=iter([protocol]))
+
+        self.ingest_api.get_related_entity(entity, 'protocols', 'protocols')
+
+        self.assertEqual(self.ingest_api.get_entity_by_uuid('protocols', 'protocol-uuid'), protocol)
+        self.assertEqual(self.ingest_api.get_entity_by_id('protocols', 'protocol-id'), protocol)
+        self.ingest_api.session.get.assert_not_called()
+
+    def test_get_related_entity_persists_relation_in_one_batch(self):
+        persistent_cache = MagicMock()
+        persistent_cache.get = MagicMock(return_value=MISSING)
+        ingest_api = IngestAPI(url='http://ingest', persistent_cache=persistent_cache)
+        entity = {'_links': {'biomaterials': {'href': 'http://ingest/processes/p1/biomaterials'}}}
+        biomaterials = [{
+            'uuid': {'uuid': f'uuid-{index}'},
+            '_links': {'self': {'href': f'http://ingest/biomaterials/{index}'}}
+        } for index in range(3)]
+        ingest_api._get_all = MagicMock(return_value=iter(biomaterials))
+
+        ingest_api.get_related_entity(entity, 'biomaterials', 'biomaterials')
+
+        persistent_cache.set.assert_not_called()
+        persistent_cache.set_many.assert_called_once()
+        keys = [key for key, _ in persistent_cache.set_many.call_args[0][0]]
+        self.assertEqual(len(keys), 7)
+        self.assertIn('http://ingest/biomaterials/search/findByUuid?uuid=uuid-0', keys)
+
+    @patch('config.PAGE_FETCH_WORKERS', 4)
+    def test_session_pool_fits_workers(self):
+        ingest_api = IngestAPI(url='http://ingest', workers=8)
+
+        adapter = ingest_api.session.get_adapter('http://ingest')
+        self.assertIs(adapter, ingest_api.session.get_adapter('https://ingest'))
+        self.assertEqual(adapter._pool_maxsize, 32)
+
+    @patch('config.INGEST_CACHE_MAX_BYTES', 1000)
+    def test_get_related_entity_respects_byte_budget(self):
+        ingest_api = IngestAPI(url='http://ingest')
+        entity = {'_links': {'biomaterials': {'href': 'http://ingest/processes/p1/biomaterials'}}}
+        biomaterials = [{
+            'uuid': {'uuid': f'uuid-{index}'},
+            'content': {'description': 'x' * 100},
+            '_links': {'self': {'href': f'http://ingest/biomaterials/{index}'}}
+        } for index in range(50)]
+        ingest_api._get_all = MagicMock(return_value=iter(biomaterials))
+
+        ingest_api.get_related_entity(entity, 'biomaterials', 'biomaterials')
+
+        stats = ingest_api.get_cache_stats()
+        self.assertGreater(stats['bytes'], 0)
+        self.assertLessEqual(stats['bytes'], 1000)
+        self.assertLess(stats['entries'], 100)
+        self.assertLessEqual(stats['relations']['bytes'], 1000)
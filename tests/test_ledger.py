@@ -0,0 +1,33 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from archiver.ledger import AccessionLedger
+
+
+class TestAccessionLedger(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'ledger.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_records_persist_across_instances(self):
+        ledger = AccessionLedger(self.path)
+        ledger.record({'HCA_sample_1': 'SAMEA1', 'HCA_project_1': 'PRJEB1'}, submission_url='submission_1')
+        ledger.close()
+
+        ledger = AccessionLedger(self.path)
+        self.assertEqual(ledger.get('HCA_sample_1'), {'accession': 'SAMEA1', 'submission_url': 'submission_1'})
+        self.assertIsNone(ledger.get('HCA_sample_2'))
+        self.assertEqual(len(ledger), 2)
+        ledger.close()
+
+    def test_record_updates_an_alias(self):
+        ledger = AccessionLedger(self.path)
+        ledger.record({'HCA_sample_1': 'SAMEA1'})
+        ledger.record({'HCA_sample_1': 'SAMEA2'}, submission_url='submission_2')
+
+        self.assertEqual(ledger.get('HCA_sample_1'), {'accession': 'SAMEA2', 'submission_url': 'submission_2'})
+        ledger.close()
@@ -0,0 +1,80 @@
+from unittest import TestCase
+
+from mock import MagicMock
+
+from archiver.archiver import Manifest
+from archiver.metadata_index import MetadataIndex
+
+
+def _entity(uuid):
+    return {'uuid': {'uuid': uuid}}
+
+
+class MetadataIndexTest(TestCase):
+    def setUp(self):
+        self.project = _entity('project')
+        self.donor = _entity('donor')
+        self.specimen = _entity('specimen')
+        self.sequencing_file = _entity('file')
+        self.collection_process = _entity('collection')
+        self.assay_process = _entity('assay')
+        self.library_preparation_protocol = _entity('library_preparation_protocol')
+        self.sequencing_protocol = _entity('sequencing_protocol')
+
+        container_relations = {
+            'biomaterials': [self.donor, self.specimen],
+            'processes': [self.collection_process, self.assay_process],
+            'protocols': [self.library_preparation_protocol, self.sequencing_protocol],
+            'files': [self.sequencing_file]
+        }
+        process_relations = {
+            ('collection', 'inputBiomaterials'): [self.donor],
+            ('collection', 'derivedBiomaterials'): [self.specimen],
+            ('assay', 'inputBiomaterials'): [self.specimen],
+            ('assay', 'derivedFiles'): [self.sequencing_file],
+            ('assay', 'protocols'): [self.library_preparation_protocol, self.sequencing_protocol]
+        }
+
+        def get_related_entity(entity, relation, entity_type):
+            if entity is self.project:
+                return container_relations[relation]
+            return process_relations.get((entity['uuid']['uuid'], relation), [])
+
+        self.ingest_api = MagicMock(name='ingest_api')
+        self.ingest_api.get_project_by_uuid = MagicMock(return_value=self.project)
+        self.ingest_api.get_related_entity = MagicMock(side_effect=get_related_entity)
+        self.ingest_api.get_concrete_entity_type = lambda protocol: protocol['uuid']['uuid']
+        self.ingest_api.get_manifest_by_id = MagicMock(return_value={
+            'fileProjectMap': ['project'],
+            'fileBiomaterialMap': ['donor', 'specimen'],
+            'fileFilesMap': ['file']
+        })
+
+        self.index = MetadataIndex(self.ingest_api, workers=2).load_project('project')
+
+    def test_load_indexes_derived_by_processes(self):
+        self.assertEqual(self.index.get_related_entity(self.specimen, 'derivedByProcesses', 'processes'),
+                         [self.collection_process])
+        self.assertEqual(self.index.get_related_entity(self.donor, 'derivedByProcesses', 'processes'), [])
+        self.assertEqual(self.index.get_related_entity(self.sequencing_file, 'derivedByProcesses', 'processes'),
+                         [self.assay_process])
+
+    def test_manifest_resolves_against_index(self):
+        self.ingest_api.get_related_entity.reset_mock()
+        manifest = Manifest(self.index, 'manifest_id')
+
+        self.assertEqual(manifest.get_project(), self.project)
+        self.assertEqual(manifest.get_assay_process(), self.assay_process)
+        self.assertEqual(manifest.get_input_biomaterial(), self.specimen)
+        self.assertEqual(manifest.get_files(), [self.sequencing_file])
+        self.assertEqual(manifest.get_library_preparation_protocol(), self.library_preparation_protocol)
+        self.assertEqual(manifest.get_sequencing_protocol(), self.sequencing_protocol)
+
+        biomaterials = list(manifest.get_biomaterials())
+        self.assertEqual(biomaterials[1].derived_from, self.donor)
+
+        self.ingest_api.get_related_entity.assert_not_called()
+
+    def test_unindexed_lookups_are_delegated(self):
+        self.ingest_api.get_biomaterial_by_uuid = MagicMock(return_value=_entity('other'))
+        self.assertEqual(self.index.get_biomaterial_by_uuid('other'), _entity('other'))
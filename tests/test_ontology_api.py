@@ -1,5 +1,8 @@
 import unittest
-from api.ontology import OntologyAPI
+
+from mock import MagicMock
+
+from api.ontology import OntologyAPI, Error
 
 
 class TestOntologyAPI(unittest.TestCase):
@@ -9,3 +12,54 @@ class TestOntologyAPI(unittest.TestCase):
     def test_expand_curie(self):
         iri = self.ontology_api.expand_curie('UO:0000015')
         self.assertTrue(iri)
+
+
+class TestOntologyAPICache(unittest.TestCase):
+    def setUp(self):
+        self.ontology_api = OntologyAPI(url='http://ontology')
+        self.ontology_api._search = MagicMock(return_value='http://www.ebi.ac.uk/efo/EFO_0009310')
+
+    def test_search_is_cached(self):
+        self.ontology_api.search('EFO:0009310')
+        iri = self.ontology_api.search('EFO:0009310')
+
+        self.assertEqual(iri, 'http://www.ebi.ac.uk/efo/EFO_0009310')
+        self.ontology_api._search.assert_called_once()
+
+    def test_search_cache_key_includes_search_options(self):
+        self.ontology_api.search('EFO:0009310')
+        self.ontology_api.search('EFO:0009310', obsolete=True)
+
+        self.assertEqual(self.ontology_api._search.call_count, 2)
+
+    def test_expand_curie_remembers_unresolvable_terms(self):
+        self.ontology_api._search = MagicMock(return_value=None)
+
+        for _ in range(2):
+            with self.assertRaises(Error):
+                self.ontology_api.expand_curie('EFO:unknown')
+
+        self.assertEqual(self.ontology_api._search.call_count, 2)
+
+    def test_expand_curies(self):
+        iris = {'EFO:0009310': 'http://www.ebi.ac.uk/efo/EFO_0009310'}
+        self.ontology_api._search = MagicMock(side_effect=lambda term, *args: iris.get(term))
+
+        lookup = self.ontology_api.expand_curies(['EFO:0009310', 'EFO:unknown', 'EFO:0009310'], workers=2)
+
+        self.assertEqual(lookup, {'EFO:0009310': 'http://www.ebi.ac.uk/efo/EFO_0009310', 'EFO:unknown': None})
+        self.assertEqual(self.ontology_api.expand_curie('EFO:0009310'), 'http://www.ebi.ac.uk/efo/EFO_0009310')
+        self.assertEqual(self.ontology_api._search.call_count, 3)
+
+    def test_search_uses_session_with_timeout(self):
+        ontology_api = OntologyAPI(url='http://ontology')
+        response = MagicMock()
+        response.content = b'{"response": {"numFound": 1, "docs": [{"iri": "http://purl.obolibrary.org/obo/UO_0000015"}]}}'
+        ontology_api.session.get = MagicMock(return_value=response)
+
+        iri = ontology_api.search('UO:0000015')
+
+        self.assertEqual(iri, 'http://purl.obolibrary.org/obo/UO_0000015')
+        ontology_api.session.get.assert_called_once_with(
+            'http://ontology/api/search?q=UO%3A0000015&exact=true&obsoletes=false&groupField=true',
+            timeout=ontology_api.timeout)
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+
+from api.ontology import OntologyAPI
+from api.ontology_index import OntologyIndex, build_index
+
+OBO = """format-version: 1.2
+ontology: efo
+
+[Term]
+id: EFO:0009310
+name: 10X v2 sequencing
+is_a: EFO:0002694 ! assay
+
+[Term]
+id: EFO:0000001
+name: old term
+is_obsolete: true
+
+[Term]
+id: UBERON:0000178
+name: blood
+
+[Typedef]
+id: part_of
+name: part of
+"""
+
+
+class TestOntologyIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        obo_path = os.path.join(self.directory.name, 'efo.obo')
+        with open(obo_path, 'w') as obo_file:
+            obo_file.write(OBO)
+        self.index_path = os.path.join(self.directory.name, 'efo.idx')
+        build_index(obo_path, self.index_path)
+        self.index = OntologyIndex(self.index_path)
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+
+    def test_search_by_curie(self):
+        self.assertEqual(self.index.search('EFO:0009310'), 'http://www.ebi.ac.uk/efo/EFO_0009310')
+        self.assertEqual(self.index.search('UBERON:0000178'), 'http://purl.obolibrary.org/obo/UBERON_0000178')
+
+    def test_search_by_label(self):
+        self.assertEqual(self.index.search('10x v2 sequencing'), 'http://www.ebi.ac.uk/efo/EFO_0009310')
+
+    def test_search_obsolete_term(self):
+        self.assertIsNone(self.index.search('EFO:0000001'))
+        self.assertEqual(self.index.search('EFO:0000001', obsolete=True), 'http://www.ebi.ac.uk/efo/EFO_0000001')
+
+    def test_search_unknown_term(self):
+        self.assertIsNone(self.index.search('EFO:9999999'))
+        self.assertIsNone(self.index.search('zzz'))
+        self.assertIsNone(self.index.search('0'))
+
+    def test_build_index_from_ols_export(self):
+        ols_path = os.path.join(self.directory.name, 'terms.json')
+        with open(ols_path, 'w') as ols_file:
+            json.dump({'_embedded': {'terms': [{
+                'iri': 'http://www.ebi.ac.uk/efo/EFO_0008931',
+                'obo_id': 'EFO:0008931',
+                'label': 'Smart-seq2',
+                'is_obsolete': False
+            }]}}, ols_file)
+        index_path = os.path.join(self.directory.name, 'terms.idx')
+        build_index(ols_path, index_path)
+
+        index = OntologyIndex(index_path)
+        self.assertEqual(index.search('Smart-seq2'), 'http://www.ebi.ac.uk/efo/EFO_0008931')
+        index.close()
+
+    def test_ontology_api_expands_curie_offline(self):
+        ontology_api = OntologyAPI(url='http://ontology', index=self.index, offline=True)
+
+        self.assertEqual(ontology_api.expand_curie('EFO:0000001'), 'http://www.ebi.ac.uk/efo/EFO_0000001')
+        self.assertIsNone(ontology_api.search('EFO:9999999'))
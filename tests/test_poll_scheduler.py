@@ -0,0 +1,67 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from utils.poll_scheduler import PollScheduler, PollTimeoutException
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestPollScheduler(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch.multiple('utils.poll_scheduler.time', monotonic=self.clock.monotonic, sleep=self.clock.sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_first_truthy_result(self):
+        target = MagicMock(side_effect=[False, False, 'done'])
+        scheduler = PollScheduler(step=10, max_step=100, jitter=0)
+
+        self.assertEqual(scheduler.poll(target), 'done')
+        self.assertEqual(scheduler.poll_count, 3)
+        self.assertTrue(scheduler.get_stats()['completed'])
+
+    def test_backs_off_exponentially_up_to_max_step(self):
+        target = MagicMock(side_effect=[False] * 5 + [True])
+        scheduler = PollScheduler(step=10, max_step=50, jitter=0)
+
+        scheduler.poll(target)
+
+        self.assertEqual(self.clock.sleeps, [10, 20, 40, 50, 50])
+
+    def test_initial_interval_scales_with_submission_size(self):
+        self.assertEqual(PollScheduler(step=10, max_step=100, size=10, entities_per_step=500).get_initial_interval(), 10)
+        self.assertEqual(PollScheduler(step=10, max_step=100, size=1200, entities_per_step=500).get_initial_interval(), 30)
+        self.assertEqual(PollScheduler(step=10, max_step=100, size=10**6, entities_per_step=500).get_initial_interval(), 100)
+
+    def test_follows_progress_rate(self):
+        pending = iter([100, 90, 80])
+        target = MagicMock(side_effect=[False, False, False, True])
+        scheduler = PollScheduler(step=1, max_step=1000, jitter=0)
+
+        scheduler.poll(target, get_pending=lambda: next(pending))
+
+        # polled again half way through the time the pending results take at the rate since the last poll
+        self.assertEqual(self.clock.sleeps, [1, 4.5, 18])
+
+    def test_timeout_is_a_hard_deadline(self):
+        target = MagicMock(return_value=False)
+        scheduler = PollScheduler(step=10, max_step=40, timeout=45, jitter=0)
+
+        with self.assertRaises(PollTimeoutException):
+            scheduler.poll(target)
+
+        self.assertEqual(self.clock.sleeps, [10, 20, 15])
+        self.assertEqual(self.clock.now, 45)
+        self.assertFalse(scheduler.get_stats()['completed'])
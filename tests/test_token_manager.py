@@ -1,6 +1,7 @@
+import threading
 import time
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from utils.token_manager import TokenManager, Token
 
@@ -24,6 +25,56 @@ class TestTokenManager(TestCase):
         new_token = token_manager.get_token()
         self.assertEqual(new_token, 'token_2')
 
+    def test_get_token_refreshes_once_under_concurrency(self):
+        token_client = MagicMock()
+
+        def retrieve_token():
+            time.sleep(.02)
+            return 'token'
+
+        token_client.retrieve_token = MagicMock(side_effect=retrieve_token)
+        token_manager = TokenManager(token_client=token_client)
+
+        threads = [threading.Thread(target=token_manager.get_token) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        token_client.retrieve_token.assert_called_once()
+        self.assertEqual(token_manager.refresh_count, 1)
+
+    @patch('utils.token_manager.threading.Timer')
+    def test_background_refresh(self, timer):
+        token_client = MagicMock()
+        token_client.retrieve_token = MagicMock(side_effect=['token_1', 'token_2', 'token_3'])
+        token_manager = TokenManager(token_client=token_client, background_refresh=True)
+        token_manager.TOKEN_DURATION = 200
+        token_manager.REFRESH_PERIOD = 100
+
+        self.assertEqual(token_manager.get_token(), 'token_1')
+        delay, refresh_in_background = timer.call_args[0]
+        self.assertAlmostEqual(delay, .09)
+        timer.return_value.start.assert_called_once()
+
+        refresh_in_background()
+
+        self.assertEqual(token_manager.background_refresh_count, 1)
+        self.assertEqual(token_manager.token.value, 'token_2')
+        self.assertEqual(timer.call_count, 2)
+
+    def test_get_stats(self):
+        token_client = MagicMock()
+        token_client.retrieve_token = MagicMock(return_value='token')
+        token_manager = TokenManager(token_client=token_client)
+        self.assertIsNone(token_manager.get_token_age())
+
+        token_manager.get_token()
+        stats = token_manager.get_stats()
+
+        self.assertGreaterEqual(stats['token_age'], 0)
+        self.assertEqual(stats['refresh_count'], 1)
+
     def test_valid_token(self):
         token = Token(value='token',
                       token_duration=3600 * 1000,
@@ -0,0 +1,33 @@
+import hashlib
+import math
+
+
+# no false negatives, about error_rate false positives while at most capacity keys are added
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.bit_count = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.bit_count / self.capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.bit_count + 7) // 8)
+
+    def add(self, key):
+        for position in self._get_positions(key):
+            self._bits[position // 8] |= 1 << (position % 8)
+        self.count += 1
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def __contains__(self, key):
+        return all(self._bits[position // 8] & (1 << (position % 8)) for position in self._get_positions(key))
+
+    def __len__(self):
+        return self.count
+
+    def _get_positions(self, key):
+        # double hashing, the k positions are derived from the two halves of one digest
+        digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        return [(first + index * second) % self.bit_count for index in range(self.hash_count)]
@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+# thread-safe LRU cache bounded by max_entries and max_bytes, with an optional ttl
+class LRUCache:
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None, cache_negative=True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_negative = cache_negative
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not MISSING
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, size, created_at = entry
+            if self.ttl is not None and time.monotonic() - created_at > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=0):
+        if not value and not self.cache_negative:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self.size_bytes += size
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def get_stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def _remove(self, key):
+        value, size, created_at = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def _evict(self):
+        while self._entries and self._is_over_budget():
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _is_over_budget(self):
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        if self.max_bytes is not None and self.size_bytes > self.max_bytes:
+            return True
+        return False
+
+
+# thread-safe SQLite cache of JSON values, entries older than max_age are treated as missing
+class SQLiteCache:
+    def __init__(self, path, max_age=None, refresh=False):
+        self.path = path
+        self.max_age = max_age
+        # when refreshing, the entries written by earlier runs are treated as missing and overwritten
+        self.created_after = time.time() if refresh else None
+
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # the cache can be rebuilt from the APIs, so a commit does not need to wait for the file to be synced
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS cache '
+                                     '(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)')
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            row = self._connection.execute('SELECT value, created_at FROM cache WHERE key = ?', (key,)).fetchone()
+
+        if row is None or self._is_stale(row[1]):
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value, size=0):
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)',
+                                     (key, json.dumps(value), time.time()))
+
+    def set_many(self, items):
+        now = time.time()
+        rows = [(key, json.dumps(value), now) for key, value in items]
+        with self._lock, self._connection:
+            self._connection.executemany('INSERT OR REPLACE INTO cache (key, value, created_at) VALUES (?, ?, ?)', rows)
+
+    def delete(self, key):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM cache')
+
+    def get_stats(self):
+        with self._lock:
+            entries = self._connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _is_stale(self, created_at):
+        if self.created_after is not None and created_at < self.created_after:
+            return True
+        return self.max_age is not None and time.time() - created_at > self.max_age
@@ -0,0 +1,52 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+_logger = logging.getLogger(__name__)
+
+
+def get_worker_count(workers):
+    return workers if workers and workers > 1 else 1
+
+
+def map_distinct(fn, keys, workers=1, errors=(Exception,), failure_message='Could not process', logger=None):
+    # returns the results of the distinct keys and, separately, the error of every key whose call raised one of errors
+    logger = logger if logger else _logger
+    keys = sorted(set(keys))
+
+    def call(key):
+        try:
+            return fn(key), None
+        except errors as e:
+            logger.warning(f'{failure_message} {key}: {str(e)}')
+            return None, e
+
+    results, failures = {}, {}
+    with ThreadPoolExecutor(max_workers=get_worker_count(workers)) as executor:
+        for key, (result, error) in zip(keys, executor.map(call, keys)):
+            if error is None:
+                results[key] = result
+            else:
+                failures[key] = error
+    return results, failures
+
+
+def map_bounded(fn, items, workers=1, ordered=True):
+    # yields (index, fn(item)) with at most workers * 2 calls in flight, so that the results of a long iterable are not
+    # all held in memory at once. Unless ordered, the results are yielded as they complete
+    workers = get_worker_count(workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        items = iter(enumerate(items))
+        while True:
+            for index, item in items:
+                pending[executor.submit(fn, item)] = index
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                return
+            if ordered:
+                done = [next(iter(pending))]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
@@ -0,0 +1,73 @@
+import random
+import time
+
+
+class PollTimeoutException(Exception):
+    pass
+
+
+# polls a target until it returns a truthy value, following the progress rate and backing off otherwise
+class PollScheduler:
+    def __init__(self, step, max_step=None, timeout=None, size=0, entities_per_step=500, backoff=2.0, jitter=0.1):
+        self.step = step
+        self.max_step = max(max_step, step) if max_step else step
+        self.timeout = timeout
+        self.size = size
+        self.entities_per_step = entities_per_step
+        self.backoff = backoff
+        self.jitter = jitter
+
+        self.poll_count = 0
+        self.elapsed = None
+        self.completed = False
+
+    def poll(self, target, get_pending=None):
+        """Returns the first truthy value of target(), raises PollTimeoutException at the timeout."""
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout is not None else None
+        interval = self.get_initial_interval()
+        last_pending, last_polled_at = None, start
+
+        while True:
+            self.poll_count += 1
+            result = target()
+            now = time.monotonic()
+            self.elapsed = now - start
+            if result:
+                self.completed = True
+                return result
+
+            pending = get_pending() if get_pending else None
+            if self.poll_count > 1:
+                interval = self.get_next_interval(interval, pending, last_pending, now - last_polled_at)
+            last_pending, last_polled_at = pending, now
+
+            delay = self._jittered(interval)
+            if deadline is not None:
+                if now >= deadline:
+                    raise PollTimeoutException(f'Gave up after {self.poll_count} polls in {self.elapsed:.1f}s')
+                delay = min(delay, deadline - now)
+            time.sleep(delay)
+
+    def get_initial_interval(self):
+        steps = 1 + self.size // self.entities_per_step if self.entities_per_step else 1
+        return self._bounded(self.step * steps)
+
+    def get_next_interval(self, interval, pending, last_pending, elapsed):
+        if pending is not None and last_pending is not None and elapsed > 0 and pending < last_pending:
+            rate = (last_pending - pending) / elapsed
+            return self._bounded(pending / rate / 2)
+        return self._bounded(interval * self.backoff)
+
+    def get_stats(self):
+        return {
+            'poll_count': self.poll_count,
+            'elapsed_seconds': round(self.elapsed, 3) if self.elapsed is not None else None,
+            'completed': self.completed
+        }
+
+    def _bounded(self, interval):
+        return min(max(interval, self.step), self.max_step)
+
+    def _jittered(self, interval):
+        return max(interval * random.uniform(1 - self.jitter, 1 + self.jitter), 0)
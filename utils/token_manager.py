@@ -1,22 +1,81 @@
+import logging
+import threading
 from datetime import datetime, timedelta
 
 
 class TokenManager:
-    def __init__(self, token_client):
+    def __init__(self, token_client, background_refresh=False):
+        self.logger = logging.getLogger(__name__)
         self.token_client = token_client
         self.token = None
         self.TOKEN_DURATION = 3600 * 1000  # 1hr in ms
         self.REFRESH_PERIOD = 60 * 20 * 1000  # 20 min in ms
+        # fraction of the token's usable lifetime after which it is renewed in the background
+        self.BACKGROUND_REFRESH_AT = 0.9
+
+        self.background_refresh = background_refresh
+        self.refresh_count = 0
+        self.background_refresh_count = 0
+        self.failed_refresh_count = 0
+
+        self._lock = threading.Lock()
+        self._refresh_timer = None
 
     def get_token(self):
-        token = None
-        if self.token and not self.token.is_expired():
-            token = self.token
-        else:
-            token_value = self.token_client.retrieve_token()
-            token = self._create_token(token_value)
-            self.token = token
-        return token.value
+        token = self.token
+        if token and not token.is_expired():
+            return token.value
+
+        with self._lock:
+            # only one thread retrieves a new token, the others wait for it instead of all calling AAP at once
+            if not self.token or self.token.is_expired():
+                self._refresh_token()
+            return self.token.value
+
+    def get_token_age(self):
+        """Returns the age of the current token in seconds, None if there is no token yet."""
+        token = self.token
+        if not token:
+            return None
+        return (datetime.now() - token.created_at).total_seconds()
+
+    def get_stats(self):
+        return {
+            'token_age': self.get_token_age(),
+            'refresh_count': self.refresh_count,
+            'background_refresh_count': self.background_refresh_count,
+            'failed_refresh_count': self.failed_refresh_count
+        }
+
+    def stop(self):
+        timer = self._refresh_timer
+        if timer:
+            timer.cancel()
+
+    def _refresh_token(self):
+        token_value = self.token_client.retrieve_token()
+        self.token = self._create_token(token_value)
+        self.refresh_count += 1
+        if self.background_refresh:
+            self._schedule_background_refresh()
+
+    def _schedule_background_refresh(self):
+        self.stop()
+        usable_duration = self.TOKEN_DURATION - self.REFRESH_PERIOD
+        delay = max(usable_duration * self.BACKGROUND_REFRESH_AT, 0) / 1000
+        self._refresh_timer = threading.Timer(delay, self._refresh_in_background)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            try:
+                self._refresh_token()
+                self.background_refresh_count += 1
+            except Exception as e:
+                # get_token refreshes synchronously once the current token expires
+                self.failed_refresh_count += 1
+                self.logger.warning(f'Background token refresh failed: {str(e)}')
 
     def _create_token(self, value):
         return Token(value=value,